@@ -1,64 +1,135 @@
+import math
 import random
-import pickle
-import os
-from collections import defaultdict
+import time
 import numpy as np
-import copy
+from bitboard import ACTIONS, ACTION_INDEX, NUM_STATES, as_bitboard, state_index, index_to_state
+from qtable import DenseQTable, CanonicalQTable, load_table_file
+from state_graph import NO_WINNER, get_graph
+from tablebase import describe, get_tablebase
+from threats import get_threats
+
+# Canonical tables are shared by both colours of an AI type, keyed by file name.
+_canonical_tables = {}
+
+# Search scores are from the side to move: completing a line scores WIN_SCORE minus the plies it takes.
+WIN_SCORE = 1000
+MATE_BOUND = WIN_SCORE - 200
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class FrozenPolicy:
+    # Read-only snapshot of a Q-table for play without training: the Q-value of every move in raw
+    # action order, and each state's greedy moves (all ties), so a lookup is two list/array indexes.
+    def __init__(self, q_table, graph):
+        self.q_values = q_table.values_matrix(np.arange(NUM_STATES))
+        legal = graph.as_dense() >= 0
+        masked = np.where(legal, self.q_values, -np.inf)
+        best = legal & (masked == masked.max(axis=1, keepdims=True))
+        self.best_moves = [[ACTIONS[a] for a in np.flatnonzero(row)] for row in best]
 
 class BlackVsWhiteAI:
-    def __init__(self, game, player):
+    table_name = "q_table"
+    # Reward shaping, also read by the batch and sweep trainers.
+    win_reward = 1.0
+    threat_penalty = None
+
+    def __init__(self, game, player, canonical=False):
         self.game = game
         self.player = player  # 'B' or 'W'
-        self.q_table = defaultdict(lambda: 0.0)
+        self.canonical = canonical  # fold symmetric and colour-swapped positions onto one entry
+        self.q_table = CanonicalQTable() if canonical else DenseQTable()
         self.learning_rate = 0.1
         self.discount_factor = 0.9
         self.epsilon = 0.1
-        self.q_table_file = f"q_table_{player.lower()}.pkl"
+        self.q_table_file = f"{self.table_name}_canonical.qtb" if canonical else f"{self.table_name}_{player.lower()}.qtb"
+        self.graph = get_graph()
         self.previous_q_values = {}
+        self.frozen = None  # FrozenPolicy while training is off
+        self.tracker = None  # optional ConvergenceTracker fed by every update
+        self.planner = None  # optional PrioritizedSweeping queueing every update's change
+        # Optional schedules (see schedules.py) replacing the fixed epsilon and learning_rate.
+        self.epsilon_schedule = None
+        self.learning_rate_schedule = None
         self.load_q_table()
 
+    def set_training(self, training):
+        # Inference mode plays greedily from a compiled snapshot and never touches the table.
+        self.frozen = None if training else FrozenPolicy(self.q_table, self.graph)
+
     def state_to_key(self, board, player):
-        board_tuple = tuple((k, board[k]) for k in sorted(board.keys()))
-        return (board_tuple, player)
+        return state_index(as_bitboard(board), player)
 
     def get_action_value(self, state, action):
+        if self.frozen:
+            return float(self.frozen.q_values[state, ACTION_INDEX[action]])
         return self.q_table[(state, action)]
 
     def get_best_move(self):
-        moves = self.game.get_available_moves()
+        state = self.state_to_key(self.game.board, self.game.current_player)
+        if self.frozen:
+            best_moves = self.frozen.best_moves[state]
+            return random.choice(best_moves) if best_moves else None
+        moves = self.graph.moves[state]
         if not moves:
             return None
 
-        state = self.state_to_key(self.game.board, self.game.current_player)
-        
-        if random.random() < self.epsilon:
+        epsilon = self.epsilon
+        if self.epsilon_schedule is not None:
+            epsilon = self.epsilon_schedule(self.steps, int(self.q_table.visits_for(state, self.graph.action_arrays[state]).sum()))
+        if random.random() < epsilon:
             return random.choice(moves)
         
-        q_values = [(self.get_action_value(state, move), move) for move in moves]
-        max_q = max(q_values, key=lambda x: x[0])[0]
-        best_moves = [move for q, move in q_values if q == max_q]
+        q_values = self.q_table.action_values(state, moves)
+        max_q = q_values.max()
+        best_moves = [move for q, move in zip(q_values, moves) if q == max_q]
         return random.choice(best_moves)
 
-    def update_q_table(self, old_state, action, reward, new_state):
+    def update_q_table(self, old_state, action, reward, new_state, final=False):
         old_q = self.q_table[(old_state, action)]
-        future_moves = self.game.get_available_moves()
-        future_q = max([self.get_action_value(new_state, move) for move in future_moves], default=0.0)
-        new_q = old_q + self.learning_rate * (reward + self.discount_factor * future_q - old_q)
+        # Bootstrap from the moves available in new_state itself; a won or drawn position has no future.
+        future_q = 0.0 if final or self.graph.terminal[new_state] else self.q_table.max_value(new_state, self.graph.action_arrays[new_state])
+        self.q_table.record_visit(old_state, action)
+        learning_rate = self.learning_rate
+        if self.learning_rate_schedule is not None:
+            learning_rate = self.learning_rate_schedule(self.steps, self.q_table.visit_count(old_state, action))
+        new_q = old_q + learning_rate * (reward + self.discount_factor * future_q - old_q)
         self.q_table[(old_state, action)] = new_q
+        self.steps += 1
+        if self.tracker is not None:
+            self.tracker.record(self.q_table, old_state, self.graph.action_arrays[old_state], ACTION_INDEX[action], old_q, new_q)
+        if self.planner is not None:
+            self.planner.record(old_state, abs(new_q - old_q))
 
-    def train(self, old_board, action, reward, new_board):
-        old_state = self.state_to_key(old_board, self.game.current_player)
-        new_state = self.state_to_key(new_board, self.game.current_player if self.game.current_player == self.player else ('W' if self.player == 'B' else 'B'))
-        self.update_q_table(old_state, action, reward, new_state)
+    def train(self, old_state, action, reward, new_state, final=False):
+        # State keys from state_to_key: the position before the move, and the resulting board keyed to the mover.
+        # final marks a move that ended the game in a draw.
+        if self.frozen:
+            return
+        self.update_q_table(old_state, action, reward, new_state, final)
 
     def save_q_table(self):
-        with open(self.q_table_file, 'wb') as f:
-            pickle.dump(dict(self.q_table), f)
+        self.q_table.save(self.q_table_file)
 
     def load_q_table(self):
-        if os.path.exists(self.q_table_file):
-            with open(self.q_table_file, 'rb') as f:
-                self.q_table = defaultdict(lambda: 0.0, pickle.load(f))
+        if self.canonical:
+            self.load_canonical_q_table()
+        else:
+            self.q_table = load_table_file(self.q_table_file) or DenseQTable()
+        # Schedules continue from the updates already stored in the table's visit counts.
+        self.steps = int(self.q_table.visits.sum())
+
+    def load_canonical_q_table(self):
+        if self.q_table_file in _canonical_tables:
+            self.q_table = _canonical_tables[self.q_table_file]
+            return
+        self.q_table = load_table_file(self.q_table_file, CanonicalQTable)
+        if self.q_table is None:
+            # The first canonical run seeds itself from both colours' existing tables.
+            tables = [load_table_file(f"{self.table_name}_{player}.qtb") for player in ('b', 'w')]
+            self.q_table = CanonicalQTable()
+            self.q_table.load_legacy(*[table.to_legacy() for table in tables if table is not None])
+            # A freshly seeded table has not been written out yet.
+            self.q_table.dirty = len(self.q_table) > 0
+        _canonical_tables[self.q_table_file] = self.q_table
 
     def inspect_q_table(self, limit=10):
         print(f"Q-Table for {self.player} (Default AI) (showing up to {limit} entries):")
@@ -67,8 +138,8 @@ class BlackVsWhiteAI:
         for i, ((state, action), q_value) in enumerate(self.q_table.items()):
             if i >= limit:
                 break
-            board, player = state
-            print(f"State: {dict(board)}, Player: {player}, Action: {action}, Q-Value: {q_value}")
+            board, player = index_to_state(state)
+            print(f"State: {board}, Player: {player}, Action: {action}, Q-Value: {q_value}")
             key = (state, action)
             if key in self.previous_q_values:
                 total_change += abs(q_value - self.previous_q_values[key])
@@ -78,33 +149,29 @@ class BlackVsWhiteAI:
         print(f"Total entries: {len(self.q_table)}, Average Q-Value Change: {avg_change:.6f}")
 
 class SharkAI(BlackVsWhiteAI):
-    def __init__(self, game, player):
-        super().__init__(game, player)
-        self.q_table_file = f"q_table_shark_{player.lower()}.pkl"
-        self.previous_q_values = {}
-        self.load_q_table()
+    table_name = "q_table_shark"
+    win_reward = 2.0
+    threat_penalty = -1.0
+
+    def __init__(self, game, player, canonical=False, threat_depth=1):
+        # Penalise moves after which the opponent can force a line within threat_depth plies (1 = next move).
+        self.threat_depth = threat_depth
+        self.threats = get_threats(threat_depth)
+        super().__init__(game, player, canonical)
 
     def opponent_can_win_next(self, new_board):
         opponent = 'W' if self.player == 'B' else 'B'
-        for pos, piece in new_board.items():
-            if piece == opponent:
-                for next_pos in self.game.connections[pos]:
-                    if new_board[next_pos] is None:
-                        temp_board = copy.deepcopy(new_board)
-                        temp_board[pos] = None
-                        temp_board[next_pos] = opponent
-                        if any(all(temp_board[p] == opponent for p in combo) for combo in self.game.winning_combos):
-                            return True
-        return False
-
-    def train(self, old_board, action, reward, new_board):
-        if self.opponent_can_win_next(new_board):
-            reward = -1.0  # Harsh penalty for allowing opponent to win next
+        return bool(self.threats[state_index(as_bitboard(new_board), opponent)])
+
+    def train(self, old_state, action, reward, new_state, final=False):
+        if self.frozen:
+            return
+        # new_state is keyed to this AI; flipping the side bit gives the opponent to move.
+        if self.threats[new_state ^ 1]:
+            reward = self.threat_penalty  # Harsh penalty for allowing opponent to win next
         elif reward == 1.0:
-            reward = 2.0  # Stronger reward for winning
-        old_state = self.state_to_key(old_board, self.game.current_player)
-        new_state = self.state_to_key(new_board, self.game.current_player if self.game.current_player == self.player else ('W' if self.player == 'B' else 'B'))
-        self.update_q_table(old_state, action, reward, new_state)
+            reward = self.win_reward  # Stronger reward for winning
+        self.update_q_table(old_state, action, reward, new_state, final)
 
     def inspect_q_table(self, limit=10):
         print(f"Q-Table for {self.player} (Shark AI) (showing up to {limit} entries):")
@@ -113,12 +180,332 @@ class SharkAI(BlackVsWhiteAI):
         for i, ((state, action), q_value) in enumerate(self.q_table.items()):
             if i >= limit:
                 break
-            board, player = state
-            print(f"State: {dict(board)}, Player: {player}, Action: {action}, Q-Value: {q_value}")
+            board, player = index_to_state(state)
+            print(f"State: {board}, Player: {player}, Action: {action}, Q-Value: {q_value}")
             key = (state, action)
             if key in self.previous_q_values:
                 total_change += abs(q_value - self.previous_q_values[key])
                 count += 1
             self.previous_q_values[key] = q_value
         avg_change = total_change / count if count > 0 else 0.0
-        print(f"Total entries: {len(self.q_table)}, Average Q-Value Change: {avg_change:.6f}")
\ No newline at end of file
+        print(f"Total entries: {len(self.q_table)}, Average Q-Value Change: {avg_change:.6f}")
+
+class PerfectAI:
+    # Plays straight from the solved tablebase: fastest forced win, otherwise a draw, otherwise the slowest loss.
+    def __init__(self, game, player):
+        self.game = game
+        self.player = player
+        self.graph = get_graph()
+        self.tablebase = get_tablebase()
+
+    def state_to_key(self, board, player):
+        return state_index(as_bitboard(board), player)
+
+    def set_training(self, training):
+        pass
+
+    def get_action_value(self, state, action):
+        return self.tablebase.move_score(state, ACTION_INDEX[action])
+
+    def get_best_move(self):
+        state = self.state_to_key(self.game.board, self.game.current_player)
+        best_moves = self.tablebase.best_moves(state)
+        return random.choice(best_moves) if best_moves else None
+
+    def train(self, old_state, action, reward, new_state, final=False):
+        pass  # the tablebase is exact, there is nothing to learn
+
+    def save_q_table(self):
+        pass
+
+    def inspect_q_table(self, limit=10):
+        state = self.state_to_key(self.game.board, self.game.current_player)
+        print(f"Tablebase for {self.player} (Perfect AI): current position is a {describe(*self.tablebase.lookup(state))}")
+        for move in self.graph.moves[state][:limit]:
+            print(f"Move: {move}, Result: {describe(*self.tablebase.move_result(state, ACTION_INDEX[move]))}")
+
+class SearchTimeout(Exception):
+    pass
+
+class SearchAI:
+    # Iterative-deepening alpha-beta over the state graph, so it plays any start position without training.
+    # The transposition table is indexed by state and kept between moves. Moves are tried in the order
+    # transposition-table move, then highest Q-value in q_tables (Black's and White's table).
+    def __init__(self, game, player, q_tables=None, time_limit=1.0, node_limit=None, max_depth=40):
+        self.game = game
+        self.player = player
+        self.graph = get_graph()
+        self.q_tables = q_tables
+        self.time_limit = time_limit  # seconds per move, None for no limit
+        self.node_limit = node_limit  # nodes per move, None for no limit
+        self.max_depth = max_depth
+        self.winning_child = [next((i for i, child in enumerate(children) if self.graph.winner[child] != NO_WINNER), -1)
+                              for children in self.graph.successor_lists]
+        self.tt = [None] * NUM_STATES  # (depth, score, bound, index of the best move)
+        self.move_order = None
+        self.stats = None
+        self.verbose = True
+
+    def state_to_key(self, board, player):
+        return state_index(as_bitboard(board), player)
+
+    def set_training(self, training):
+        pass
+
+    def get_action_value(self, state, action):
+        # Search score of the move scaled to [-1, 1], from the last search that reached the position after it.
+        child = self.graph.successor(state, ACTION_INDEX[action])
+        if self.graph.terminal[child]:
+            return 1.0
+        entry = self.tt[child]
+        return -entry[1] / WIN_SCORE if entry else 0.0
+
+    def update_move_order(self):
+        graph = self.graph
+        if self.q_tables is None:
+            if self.move_order is None:
+                self.move_order = [list(range(len(children))) for children in graph.successor_lists]
+            return
+        # Re-read every move so orderings follow the tables while they train.
+        black, white = self.q_tables
+        states = np.arange(NUM_STATES)
+        q_values = np.where((states & 1)[:, None] == 0, black.values_matrix(states), white.values_matrix(states))
+        rows = np.repeat(states, np.diff(graph.indptr))
+        order = np.lexsort((-q_values[rows, graph.actions], rows)) - graph.indptr[rows]
+        self.move_order = [order[graph.indptr[s]:graph.indptr[s + 1]].tolist() for s in range(NUM_STATES)]
+
+    def check_budget(self):
+        if not self.stoppable:
+            return
+        if (self.deadline is not None and time.perf_counter() > self.deadline) or (self.node_limit and self.nodes >= self.node_limit):
+            raise SearchTimeout
+
+    def negamax(self, state, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.check_budget()
+        if self.winning_child[state] >= 0:
+            return WIN_SCORE - ply - 1
+        children = self.graph.successor_lists[state]
+        if not children or depth == 0:
+            return 0  # no moves ends the game without a winner; unknown leaves count as even
+        best_index = -1
+        entry = self.tt[state]
+        if entry is not None:
+            entry_depth, score, bound, best_index = entry
+            if entry_depth >= depth:
+                # Win scores are stored relative to this position, not to the root.
+                score = score - ply if score >= MATE_BOUND else score + ply if score <= -MATE_BOUND else score
+                if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                    return score
+        order = self.move_order[state]
+        if best_index >= 0:
+            order = [best_index] + [i for i in order if i != best_index]
+        original_alpha = alpha
+        best_score = -WIN_SCORE - 1
+        self.path.add(state)
+        try:
+            for i in order:
+                child = children[i]
+                # Going round in circles is a draw, as with the repetition rule.
+                score = 0 if child in self.path else -self.negamax(child, depth - 1, -beta, -alpha, ply + 1)
+                if score > best_score:
+                    best_score, best_index = score, i
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    break
+        finally:
+            self.path.discard(state)
+        bound = UPPER if best_score <= original_alpha else LOWER if best_score >= beta else EXACT
+        stored = best_score + ply if best_score >= MATE_BOUND else best_score - ply if best_score <= -MATE_BOUND else best_score
+        self.tt[state] = (depth, stored, bound, best_index)
+        return best_score
+
+    def get_best_move(self):
+        state = self.state_to_key(self.game.board, self.game.current_player)
+        moves = self.graph.moves[state]
+        if not moves:
+            return None
+        if self.winning_child[state] >= 0:
+            return moves[self.winning_child[state]]
+        self.update_move_order()
+        self.nodes = 0
+        self.path = set()
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit if self.time_limit else None
+        best_index, completed, score = self.move_order[state][0], 0, 0
+        for depth in range(1, self.max_depth + 1):
+            self.stoppable = depth > 1  # always finish depth 1, so there is a move to play
+            try:
+                score = self.negamax(state, depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+            except SearchTimeout:
+                break
+            best_index, completed = self.tt[state][3], depth
+            if abs(score) >= MATE_BOUND:
+                break  # forced result found, deeper search cannot change it
+        elapsed = time.perf_counter() - start
+        self.stats = {"depth": completed, "nodes": self.nodes, "seconds": elapsed, "score": score,
+                      "nodes_per_sec": self.nodes / elapsed if elapsed > 0 else 0.0}
+        if self.verbose:
+            print(f"Search ({self.player}): depth {completed}, score {score}, {self.nodes} nodes in {elapsed:.3f}s "
+                  f"({self.stats['nodes_per_sec']:.0f} nodes/sec)")
+        return moves[best_index]
+
+    def train(self, old_state, action, reward, new_state, final=False):
+        pass  # nothing to learn, the search starts from the rules alone
+
+    def save_q_table(self):
+        pass
+
+    def inspect_q_table(self, limit=10):
+        state = self.state_to_key(self.game.board, self.game.current_player)
+        print(f"Search for {self.player} (Search AI): last search {self.stats}")
+        for move in self.graph.moves[state][:limit]:
+            print(f"Move: {move}, Score: {self.get_action_value(state, move):.3f}")
+
+class MCTSNode:
+    def __init__(self, children, priors):
+        self.children = children  # successor states, in graph order
+        self.priors = priors
+        self.visits = [0] * len(children)
+        self.totals = [0.0] * len(children)  # summed results from the point of view of the side to move here
+        self.total_visits = 0
+
+class MCTSAI:
+    # UCT search over a transposition map from state index to node, so positions reached by different
+    # move orders share statistics and the tree under the played move is still there next turn.
+    # Leaves are valued by a random playout that always takes an immediate win; unvisited moves start
+    # from the Default Q-values in q_tables (Black's and White's table), worth prior_weight playouts.
+    def __init__(self, game, player, q_tables=None, playouts=2000, time_limit=None, exploration=1.4, prior_weight=1.0, max_rollout=60):
+        self.game = game
+        self.player = player
+        self.graph = get_graph()
+        self.q_tables = q_tables
+        # A move stops after `playouts` playouts or `time_limit` seconds, whichever comes first; None disables
+        # either, but not both, or the search would never stop.
+        if playouts is None and time_limit is None:
+            raise ValueError("MCTSAI needs a playout or time budget")
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.prior_weight = prior_weight
+        self.max_rollout = max_rollout
+        self.winning_child = [next((i for i, child in enumerate(children) if self.graph.winner[child] != NO_WINNER), -1)
+                              for children in self.graph.successor_lists]
+        self.nodes = {}
+        self.stats = None
+        self.verbose = True
+
+    def state_to_key(self, board, player):
+        return state_index(as_bitboard(board), player)
+
+    def set_training(self, training):
+        pass
+
+    def get_action_value(self, state, action):
+        # Mean playout result of the move, in [-1, 1] for the side to move.
+        node = self.nodes.get(state)
+        if node is None:
+            return 0.0
+        i = self.graph.action_arrays[state].tolist().index(ACTION_INDEX[action])
+        return node.totals[i] / node.visits[i] if node.visits[i] else node.priors[i]
+
+    def expand(self, state):
+        children = self.graph.successor_lists[state]
+        if self.q_tables is None:
+            priors = [0.0] * len(children)
+        else:
+            table = self.q_tables[state & 1]
+            priors = np.clip(table.values_for(state, self.graph.action_arrays[state]), -1.0, 1.0).tolist()
+        node = self.nodes[state] = MCTSNode(children, priors)
+        return node
+
+    def select(self, node):
+        log_total = math.log(node.total_visits + 1)
+        best_i, best_score = 0, -math.inf
+        for i, visits in enumerate(node.visits):
+            mean = (node.totals[i] + self.prior_weight * node.priors[i]) / (visits + self.prior_weight)
+            score = mean + self.exploration * math.sqrt(log_total / (visits + 1))
+            if score > best_score:
+                best_i, best_score = i, score
+        return best_i
+
+    def rollout(self, state):
+        # Result for the side to move in state: 1 win, -1 loss, 0 when stuck or out of moves.
+        successor_lists, winning_child = self.graph.successor_lists, self.winning_child
+        for ply in range(self.max_rollout):
+            if winning_child[state] >= 0:
+                return 1.0 if ply % 2 == 0 else -1.0
+            children = successor_lists[state]
+            if not children:
+                return 0.0
+            state = random.choice(children)
+        return 0.0
+
+    def playout(self, root):
+        path = []
+        on_path = {root}
+        state = root
+        while True:
+            node = self.nodes.get(state)
+            if node is None:
+                value = self.rollout(state)
+                self.expand(state)
+                break
+            if not node.children:
+                value = 0.0
+                break
+            i = self.select(node)
+            path.append((node, i))
+            state = node.children[i]
+            if self.graph.terminal[state]:
+                value = -1.0  # the side to move here has just been beaten
+                break
+            if state in on_path:
+                value = 0.0  # going round in circles is a draw, as with the repetition rule
+                break
+            on_path.add(state)
+        for node, i in reversed(path):
+            value = -value
+            node.visits[i] += 1
+            node.totals[i] += value
+            node.total_visits += 1
+
+    def get_best_move(self):
+        state = self.state_to_key(self.game.board, self.game.current_player)
+        moves = self.graph.moves[state]
+        if not moves:
+            return None
+        if self.winning_child[state] >= 0:
+            return moves[self.winning_child[state]]
+        root = self.nodes.get(state) or self.expand(state)
+        reused = root.total_visits
+        start = time.perf_counter()
+        deadline = start + self.time_limit if self.time_limit else None
+        playouts = 0
+        while (self.playouts is None or playouts < self.playouts) and (deadline is None or time.perf_counter() < deadline):
+            self.playout(state)
+            playouts += 1
+        elapsed = time.perf_counter() - start
+        best_i = max(range(len(moves)), key=lambda i: root.visits[i])
+        self.stats = {"playouts": playouts, "reused": reused, "nodes": len(self.nodes), "seconds": elapsed,
+                      "playouts_per_sec": playouts / elapsed if elapsed > 0 else 0.0}
+        if self.verbose:
+            print(f"MCTS ({self.player}): {playouts} playouts in {elapsed:.3f}s ({self.stats['playouts_per_sec']:.0f}/sec), "
+                  f"{reused} reused, {len(self.nodes)} nodes, best move {moves[best_i]} value {root.totals[best_i] / max(root.visits[best_i], 1):.3f}")
+        return moves[best_i]
+
+    def train(self, old_state, action, reward, new_state, final=False):
+        pass  # the tree is grown by search, not by the game's rewards
+
+    def save_q_table(self):
+        pass
+
+    def inspect_q_table(self, limit=10):
+        state = self.state_to_key(self.game.board, self.game.current_player)
+        print(f"Search tree for {self.player} (MCTS AI): last search {self.stats}")
+        node = self.nodes.get(state)
+        for i, move in enumerate(self.graph.moves[state][:limit]):
+            visits = node.visits[i] if node else 0
+            print(f"Move: {move}, Visits: {visits}, Value: {self.get_action_value(state, move):.3f}")
\ No newline at end of file
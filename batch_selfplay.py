@@ -0,0 +1,213 @@
+import argparse
+import random
+import sys
+import time
+import numpy as np
+from bitboard import Bitboard, CELL_BITS, state_index
+from repetition import DrawRule
+from simulator import HeadlessSimulator, add_simulation_arguments, parse_draw_rule, parse_positions, parse_schedules, parse_start_distribution
+from state_graph import NO_WINNER, get_graph
+
+
+class BatchSelfPlay:
+    # Steps a whole batch of games per side at once: epsilon-greedy selection, move application,
+    # win detection and the BlackVsWhiteAI.train/SharkAI.train update, all as array operations.
+    def __init__(self, black_ai, white_ai, batch_size=16384, seed=None, draw_rule=None):
+        graph = get_graph()
+        self.successors = graph.as_dense().astype(np.intp)
+        self.legal = self.successors >= 0
+        self.winner = graph.winner
+        self.terminal = self.winner != NO_WINNER
+        self.stuck = ~self.legal.any(axis=1)
+        self.ais = (black_ai, white_ai)
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        # Only the move cap applies here; per-game repetition counts would cost a full state table per slot.
+        self.draw_rule = draw_rule or DrawRule()
+        self.black_wins = 0
+        self.white_wins = 0
+        self.draws = 0
+        self.no_winner = 0
+        self.moves_played = 0
+
+    def choose_actions(self, ai, states):
+        legal = self.legal[states]
+        q = ai.q_table.values_matrix(states)
+        best = legal & (q == np.where(legal, q, -np.inf).max(axis=1, keepdims=True))
+        epsilon = ai.epsilon
+        if ai.epsilon_schedule is not None:
+            epsilon = ai.epsilon_schedule.values(ai.steps, np.where(legal, ai.q_table.visits_matrix(states), 0).sum(axis=1))
+        explore = self.rng.random(len(states)) < epsilon
+        candidates = np.where(explore[:, None], legal, best)
+        # Random weights pick uniformly among the candidate moves, like random.choice.
+        return np.argmax(candidates * self.rng.random(legal.shape, dtype=np.float32), axis=1)
+
+    def step_side(self, side, states, last_move):
+        ai = self.ais[side]
+        actions = self.choose_actions(ai, states)
+        children = self.successors[states, actions]
+        won = self.winner[children] == side + 1
+        # train() keys the new board to the mover itself, i.e. the child with the side bit flipped back.
+        own_view = children ^ 1
+        draw = last_move & ~won & ~self.stuck[own_view]
+        reward = np.where(won, ai.win_reward, np.where(self.stuck[own_view], -0.1, np.where(draw, self.draw_rule.reward, 0.0)))
+        if ai.threat_penalty is not None:
+            reward = np.where(ai.threats[children], ai.threat_penalty, reward)
+
+        future = np.where(self.legal[own_view], ai.q_table.values_matrix(own_view), -np.inf).max(axis=1)
+        future_q = np.where(self.terminal[own_view] | self.stuck[own_view] | draw, 0.0, future)
+        self.update(ai, states, actions, reward + ai.discount_factor * future_q)
+        ai.steps += len(states)
+        self.moves_played += len(states)
+        return children, won, draw
+
+    def update(self, ai, states, actions, targets):
+        # Applies every slot's update in slot order, as the sequential trainer would one after another.
+        # An entry updated N times in the batch (the same opening in many games, or symmetric positions
+        # of a canonical table) is done in closed form: with rates a_1..a_N it ends at
+        # prod(1 - a_k) * Q + sum_k a_k * prod(1 - a_j for j > k) * target_k.
+        table = ai.q_table
+        rows, cols = table.entries(states, actions)
+        keys = rows * table.values.shape[1] + cols
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        entries, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        group = np.repeat(np.arange(len(entries)), counts)
+        last = first + counts - 1
+        rows, cols = np.divmod(entries, table.values.shape[1])
+        rates = np.full(len(keys), ai.learning_rate)
+        if ai.learning_rate_schedule is not None:
+            # The k-th update of an entry in this batch sees its visits so far plus k, as if played one by one.
+            visits = table.visits[rows, cols].astype(np.int64)[group] + np.arange(len(keys)) - first[group] + 1
+            rates = ai.learning_rate_schedule.values(ai.steps, visits)
+        table.visits[rows, cols] += counts.astype(np.uint32)
+        # log(1 - a) summed along the batch; a rate of 1 forgets everything before it, so those are counted apart.
+        full = rates >= 1.0
+        log_keep = np.log1p(-np.where(full, 0.0, rates))
+        kept = np.cumsum(log_keep)
+        resets = np.cumsum(full)
+        survives = np.exp(kept[last][group] - kept) * (resets[last][group] == resets)
+        decay = np.exp(kept[last] - kept[first] + log_keep[first]) * (resets[last] - resets[first] + full[first] == 0)
+        updates = np.bincount(group, rates * survives * targets[order], len(entries))
+        table.values[rows, cols] = decay * table.values[rows, cols] + updates
+        table.seen[rows, cols] = True
+        table.dirty = True
+
+    def starts(self, count):
+        if self.start_distribution:
+            return self.start_distribution.sample_many(self.rng, count)
+        return self.start_state
+
+    def run(self, num_games, start_state, start_distribution=None):
+        # With a StartDistribution every game, including refills, starts from a sampled position.
+        self.start_state = start_state
+        self.start_distribution = start_distribution
+        batch = min(self.batch_size, num_games)
+        states = np.empty(batch, dtype=np.intp)
+        states[:] = self.starts(batch)
+        plies = np.zeros(batch, dtype=np.int64)
+        active = np.ones(batch, dtype=bool)
+        started = batch
+        while active.any():
+            sides = states & 1
+            # A game whose side to move already has a line or cannot move ends before moving, as in play_one_game.
+            own_line = active & (self.winner[states] == sides + 1)
+            stuck = active & ~own_line & self.stuck[states]
+            self.black_wins += int((own_line & (sides == 0)).sum())
+            self.white_wins += int((own_line & (sides == 1)).sum())
+            self.no_winner += int(stuck.sum())
+            ended = own_line | stuck
+            moving = active & ~ended
+            plies[moving] += 1
+            last_move = plies >= self.draw_rule.max_plies if self.draw_rule.max_plies else np.zeros(batch, dtype=bool)
+            for side in (0, 1):
+                idx = np.flatnonzero(moving & (sides == side))
+                if len(idx):
+                    children, won, draw = self.step_side(side, states[idx], last_move[idx])
+                    states[idx] = children
+                    ended[idx[won | draw]] = True
+                    self.draws += int(draw.sum())
+                    if side == 0:
+                        self.black_wins += int(won.sum())
+                    else:
+                        self.white_wins += int(won.sum())
+            # Finished slots start a new game until num_games have been started.
+            finished = np.flatnonzero(ended)
+            refill = finished[:max(0, num_games - started)]
+            states[refill] = self.starts(len(refill))
+            plies[refill] = 0
+            started += len(refill)
+            active[finished[len(refill):]] = False
+        return self.black_wins + self.white_wins + self.draws + self.no_winner
+
+
+def compare_with_sequential(args, black, white, schedules, start_distribution, min_visits=100):
+    # Trains fresh in-memory tables for the same games with this trainer and with the sequential
+    # simulator, then compares the entries both visited often; the Q-table files are never touched.
+    # A second sequential run with another seed gives the difference to expect from chance alone.
+    start_state = state_index(Bitboard(sum(CELL_BITS[p] for p in black), sum(CELL_BITS[p] for p in white)), args.first)
+    seed = args.seed if args.seed is not None else 0
+    tables = []
+    for trainer, seed in (("batch", seed), ("sequential", seed), ("sequential", seed + 1)):
+        simulator = HeadlessSimulator(args.canonical, threat_depth=args.threat_depth, draw_rule=parse_draw_rule(args))
+        simulator.checkpoints.close(save=False)
+        simulator.set_schedules(*schedules)
+        ais = (simulator.get_ai('B', args.black), simulator.get_ai('W', args.white))
+        fresh = {}
+        for ai in ais:
+            ai.q_table = fresh.setdefault(ai.q_table_file, type(ai.q_table)())
+            ai.steps = 0
+        start = time.perf_counter()
+        if trainer == "batch":
+            BatchSelfPlay(*ais, args.batch_size, seed, parse_draw_rule(args)).run(args.games, start_state, start_distribution)
+        else:
+            random.seed(seed)
+            simulator.set_initial_board(black, white, args.first)
+            simulator.set_start_distribution(start_distribution)
+            for _ in range(args.games):
+                simulator.play_one_game(args.black, args.white)
+        print(f"{trainer} (seed {seed}): {args.games} games in {time.perf_counter() - start:.2f}s")
+        tables.append([ai.q_table for ai in ais])
+    for player, batch_table, sequential_table, reference_table in zip(("Black", "White"), *tables):
+        for name, table, other in (("batch vs sequential", batch_table, sequential_table), ("sequential vs sequential", reference_table, sequential_table)):
+            both = (table.visits >= min_visits) & (other.visits >= min_visits)
+            if not both.any():
+                print(f"{player}, {name}: no entry visited {min_visits}+ times by both")
+                continue
+            diff = np.abs(table.values[both] - other.values[both])
+            print(f"{player}, {name}: {int(both.sum())} entries visited {min_visits}+ times by both, "
+                  f"|dQ| mean {diff.mean():.4f}, max {diff.max():.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorised batch self-play trainer.")
+    add_simulation_arguments(parser)
+    parser.add_argument("--batch-size", type=int, default=16384, help="Games stepped together")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--compare-sequential", action="store_true", help="Train fresh in-memory tables with this and the sequential trainer and compare their Q-values")
+    args = parser.parse_args(argv)
+    black, white = parse_positions(parser, args)
+    if args.compare_sequential:
+        compare_with_sequential(args, black, white, parse_schedules(parser, args), parse_start_distribution(parser, args))
+        return 0
+
+    simulator = HeadlessSimulator(args.canonical, threat_depth=args.threat_depth)
+    black_ai = simulator.get_ai('B', args.black)
+    white_ai = simulator.get_ai('W', args.white)
+    simulator.set_schedules(*parse_schedules(parser, args))
+    board = Bitboard(sum(CELL_BITS[p] for p in black), sum(CELL_BITS[p] for p in white))
+    trainer = BatchSelfPlay(black_ai, white_ai, args.batch_size, args.seed, parse_draw_rule(args))
+    start_distribution = parse_start_distribution(parser, args)
+    start = time.perf_counter()
+    games = trainer.run(args.games, state_index(board, args.first), start_distribution)
+    elapsed = time.perf_counter() - start
+    black_ai.save_q_table()
+    white_ai.save_q_table()
+    print(f"Completed {games} games ({trainer.moves_played} moves) in {elapsed:.2f}s "
+          f"({games / elapsed:.0f} games/sec, {trainer.moves_played / elapsed:.0f} moves/sec)")
+    print(f"Black: {trainer.black_wins} | White: {trainer.white_wins} | Draws: {trainer.draws} | No winner: {trainer.no_winner}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
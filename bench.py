@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from bitboard import NUM_STATES, index_to_state, state_index
+from simulator import HeadlessSimulator
+
+BENCH_FILE = "bench_results.json"
+
+
+def timer_overhead(samples=10000):
+    # Median cost of one perf_counter_ns() pair, taken off every per-call timing.
+    timer = time.perf_counter_ns
+    costs = []
+    for _ in range(samples):
+        t0 = timer()
+        costs.append(timer() - t0)
+    return float(np.median(costs))
+
+
+def measure(fn, calls, batch=100):
+    # Throughput comes from calls timed in batches, so timer overhead stays out of sub-microsecond
+    # ops. The percentiles need per-call latencies, so a second pass times every call on its own
+    # (minus the timer's own cost); ops timed one at a time already (batch=1) are not run twice.
+    latencies = []
+    total = 0.0
+    for start in range(0, calls, batch):
+        n = min(batch, calls - start)
+        t0 = time.perf_counter()
+        for i in range(start, start + n):
+            fn(i)
+        elapsed = time.perf_counter() - t0
+        total += elapsed
+        latencies.append(elapsed)
+    if batch > 1:
+        timer = time.perf_counter_ns
+        overhead = timer_overhead()
+        latencies = []
+        for i in range(calls):
+            t0 = timer()
+            fn(i)
+            latencies.append(timer() - t0)
+        latencies = np.maximum(np.array(latencies) - overhead, 0.0) / 1e9
+    return {
+        "ops": calls,
+        "seconds": round(total, 6),
+        "ops_per_sec": round(calls / total, 1) if total > 0 else None,
+        "p50_us": round(float(np.percentile(latencies, 50)) * 1e6, 3),
+        "p99_us": round(float(np.percentile(latencies, 99)) * 1e6, 3),
+    }
+
+
+def sample_positions(rng, count):
+    # Live positions only: neither side has a line yet.
+    positions = []
+    while len(positions) < count:
+        board, player = index_to_state(int(rng.integers(NUM_STATES)))
+        if not board.has_won('B') and not board.has_won('W'):
+            positions.append((board, player))
+    return positions
+
+
+def sample_transitions(positions):
+    transitions = []
+    for board, player in positions:
+        moves = board.available_moves(player)
+        if not moves:
+            continue
+        from_pos, to_pos = moves[len(transitions) % len(moves)]
+        after = board.copy()
+        after.move(from_pos, to_pos, player)
+        reward = 1.0 if after.has_won(player) else 0.0
+        transitions.append((state_index(board, player), (from_pos, to_pos), reward, state_index(after, player), after, player))
+    return transitions
+
+
+def run_benchmarks(calls=100000, games=2000, io_rounds=50, seed=0):
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    simulator = HeadlessSimulator()
+    # Benchmarks train in memory only; never write the real tables.
+    simulator.checkpoints.close(save=False)
+    default_ai = simulator.ai_black_default
+    shark_ai = simulator.ai_black_shark
+    positions = sample_positions(rng, calls)
+    transitions = sample_transitions(positions)
+    results = {}
+
+    def on_board(i):
+        simulator.board, simulator.current_player = positions[i]
+
+    def available_moves(i):
+        on_board(i)
+        simulator.get_available_moves()
+
+    def check_winner(i):
+        on_board(i)
+        simulator.check_winner()
+
+    def state_to_key(i):
+        board, player = positions[i]
+        default_ai.state_to_key(board, player)
+
+    def best_move(i):
+        on_board(i)
+        default_ai.get_best_move()
+
+    def update(i):
+        old_state, action, reward, new_state, _, _ = transitions[i]
+        default_ai.update_q_table(old_state, action, reward, new_state)
+
+    def threat_check(i):
+        _, _, _, _, after, player = transitions[i]
+        shark_ai.player = player
+        shark_ai.opponent_can_win_next(after)
+
+    results["get_available_moves"] = measure(available_moves, len(positions))
+    results["check_winner"] = measure(check_winner, len(positions))
+    results["state_to_key"] = measure(state_to_key, len(positions))
+    results["get_best_move"] = measure(best_move, len(positions))
+    results["update_q_table"] = measure(update, len(transitions))
+    results["opponent_can_win_next"] = measure(threat_check, len(transitions))
+    shark_ai.player = 'B'
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        q_table_file = default_ai.q_table_file
+        default_ai.q_table_file = os.path.join(temp_dir, os.path.basename(q_table_file))
+        results["save_q_table"] = measure(lambda i: default_ai.save_q_table(), io_rounds, batch=1)
+        results["load_q_table"] = measure(lambda i: default_ai.load_q_table(), io_rounds, batch=1)
+        results["save_q_table"]["entries"] = results["load_q_table"]["entries"] = len(default_ai.q_table)
+        results["save_q_table"]["bytes"] = os.path.getsize(default_ai.q_table_file)
+    finally:
+        # Back to the real table, so nothing keeps the temporary file mapped.
+        default_ai.q_table_file = q_table_file
+        default_ai.load_q_table()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    simulator.set_initial_board("C 3 5".split(), "2 4 7".split(), 'B')
+    results["self_play_game"] = measure(lambda i: simulator.play_one_game("Shark", "Default"), games, batch=1)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Returns the ops whose throughput fell by more than `tolerance` against the baseline run.
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("ops_per_sec") or not result["ops_per_sec"]:
+            continue
+        ratio = result["ops_per_sec"] / old["ops_per_sec"]
+        flag = "  REGRESSION" if ratio < 1.0 - tolerance else ""
+        print(f"{name:24s} {old['ops_per_sec']:>14,.0f} -> {result['ops_per_sec']:>14,.0f} ops/sec ({ratio:.2f}x){flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the engine, AI and Q-table persistence hot paths.")
+    parser.add_argument("--calls", type=int, default=100000, help="Calls per micro-benchmark")
+    parser.add_argument("--games", type=int, default=2000, help="Self-play games to time")
+    parser.add_argument("--io-rounds", type=int, default=50, help="Q-table saves and loads to time")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", default=BENCH_FILE, help="JSON file to write the results to")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop before --compare fails")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.calls, args.games, args.io_rounds, args.seed)
+    for name, result in results.items():
+        print(f"{name:24s} {result['ops_per_sec']:>14,.0f} ops/sec  p50 {result['p50_us']:10.3f} us  p99 {result['p99_us']:10.3f} us")
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Slower than {args.compare}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
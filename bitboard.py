@@ -0,0 +1,201 @@
+from collections.abc import MutableMapping
+
+# Cells in the same order state_to_key has always sorted them: ring 1-8, then the centre.
+CELLS = ('1', '2', '3', '4', '5', '6', '7', '8', 'C')
+CELL_INDEX = {cell: i for i, cell in enumerate(CELLS)}
+CELL_BITS = {cell: 1 << i for i, cell in enumerate(CELLS)}
+FULL_MASK = (1 << len(CELLS)) - 1
+
+CONNECTIONS = {
+    '1': ['C', '2', '8'], '2': ['C', '1', '3'], '3': ['C', '2', '4'], '4': ['C', '3', '5'],
+    '5': ['C', '4', '6'], '6': ['C', '5', '7'], '7': ['C', '6', '8'], '8': ['C', '7', '1'],
+    'C': ['1', '2', '3', '4', '5', '6', '7', '8']
+}
+WINNING_COMBOS = [('1', 'C', '5'), ('2', 'C', '6'), ('3', 'C', '7'), ('8', 'C', '4')]
+
+NEIGHBOUR_MASKS = tuple(sum(CELL_BITS[n] for n in CONNECTIONS[cell]) for cell in CELLS)
+WIN_MASKS = tuple(sum(CELL_BITS[p] for p in combo) for combo in WINNING_COMBOS)
+
+# Every lookup below is indexed by a 9-bit mask, so the hot paths never loop over cells.
+HAS_LINE = tuple(any((mask & win) == win for win in WIN_MASKS) for mask in range(FULL_MASK + 1))
+SET_BITS = tuple(tuple(i for i in range(len(CELLS)) if mask & (1 << i)) for mask in range(FULL_MASK + 1))
+# MOVE_TABLE[i][empty] lists the moves out of cell i, in CONNECTIONS order, given the empty cells.
+MOVE_TABLE = tuple(
+    tuple(tuple((cell, n) for n in CONNECTIONS[cell] if empty & CELL_BITS[n]) for empty in range(FULL_MASK + 1))
+    for cell in CELLS
+)
+
+# Directed moves along each connection, in the order available_moves yields them.
+ACTIONS = tuple((cell, n) for cell in CELLS for n in CONNECTIONS[cell])
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+NUM_ACTIONS = len(ACTIONS)
+
+# Perfect index over every 3-vs-3 position: board rank * 2 + side to move (0 for B, 1 for W).
+BOARDS = tuple(
+    (black, white)
+    for black in range(FULL_MASK + 1) if len(SET_BITS[black]) == 3
+    for white in range(FULL_MASK + 1) if len(SET_BITS[white]) == 3 and not black & white
+)
+BOARD_RANK = {(black << 9) | white: i for i, (black, white) in enumerate(BOARDS)}
+NUM_STATES = 2 * len(BOARDS)
+
+# The 16 rotations/reflections of the ring map winning lines and connections onto themselves.
+# Each symmetry is a cell permutation; PERMUTED_MASKS and SYMMETRY_ACTIONS apply it to masks and moves.
+SYMMETRIES = tuple(
+    tuple(((-i if reflect else i) + rotation) % 8 for i in range(8)) + (8,)
+    for reflect in (False, True) for rotation in range(8)
+)
+PERMUTED_MASKS = tuple(
+    tuple(sum(1 << perm[i] for i in SET_BITS[mask]) for mask in range(FULL_MASK + 1))
+    for perm in SYMMETRIES
+)
+SYMMETRY_ACTIONS = tuple(
+    tuple(ACTION_INDEX[(CELLS[perm[CELL_INDEX[f]]], CELLS[perm[CELL_INDEX[t]]])] for f, t in ACTIONS)
+    for perm in SYMMETRIES
+)
+
+
+def _canonical_forms():
+    # Express each state from the keyed player's point of view (their pieces stored as black),
+    # then take the smallest board over all symmetries. A position symmetric to itself reaches that
+    # board under several symmetries; each move takes its smallest image under them, so equivalent
+    # moves in it share one canonical action too.
+    states, symmetries, actions = [], [], []
+    for black, white in BOARDS:
+        for own, other in ((black, white), (white, black)):
+            forms = [(PERMUTED_MASKS[sym][own] << 9) | PERMUTED_MASKS[sym][other] for sym in range(len(SYMMETRIES))]
+            best = min(forms)
+            mapping = [sym for sym, form in enumerate(forms) if form == best]
+            states.append(BOARD_RANK[best] << 1)
+            symmetries.append(mapping[0])
+            actions.append(tuple(min(SYMMETRY_ACTIONS[sym][a] for sym in mapping) for a in range(NUM_ACTIONS)))
+    return tuple(states), tuple(symmetries), tuple(actions)
+
+
+CANONICAL_STATE, CANONICAL_SYMMETRY, CANONICAL_ACTION = _canonical_forms()
+
+
+def available_moves(own, empty):
+    moves = []
+    for i in SET_BITS[own]:
+        moves.extend(MOVE_TABLE[i][empty])
+    return moves
+
+
+def can_win_next(own, empty):
+    # True if moving any one of `own`'s pieces to an adjacent empty cell completes a line.
+    for i in SET_BITS[own]:
+        rest = own ^ (1 << i)
+        for j in SET_BITS[NEIGHBOUR_MASKS[i] & empty]:
+            if HAS_LINE[rest | (1 << j)]:
+                return True
+    return False
+
+
+def as_bitboard(board):
+    return board if isinstance(board, Bitboard) else Bitboard.from_dict(board)
+
+
+def state_index(board, player):
+    return (BOARD_RANK[(board.black << 9) | board.white] << 1) | (player == 'W')
+
+
+def index_to_state(index):
+    black, white = BOARDS[index >> 1]
+    return Bitboard(black, white), 'W' if index & 1 else 'B'
+
+
+class Bitboard(MutableMapping):
+    __slots__ = ('black', 'white')
+
+    def __init__(self, black=0, white=0):
+        self.black = black
+        self.white = white
+
+    @classmethod
+    def from_dict(cls, board):
+        black = white = 0
+        for pos, piece in board.items():
+            if piece == 'B':
+                black |= CELL_BITS[pos]
+            elif piece == 'W':
+                white |= CELL_BITS[pos]
+        return cls(black, white)
+
+    def to_dict(self):
+        return {cell: self[cell] for cell in CELLS}
+
+    def mask(self, player):
+        return self.black if player == 'B' else self.white
+
+    def empty(self):
+        return FULL_MASK & ~(self.black | self.white)
+
+    def available_moves(self, player):
+        return available_moves(self.mask(player), self.empty())
+
+    def has_won(self, player):
+        return HAS_LINE[self.mask(player)]
+
+    def is_winning_move(self, from_pos, to_pos, player):
+        return HAS_LINE[(self.mask(player) & ~CELL_BITS[from_pos]) | CELL_BITS[to_pos]]
+
+    def can_win_next(self, player):
+        return can_win_next(self.mask(player), self.empty())
+
+    def move(self, from_pos, to_pos, player):
+        if player == 'B':
+            self.black = (self.black & ~CELL_BITS[from_pos]) | CELL_BITS[to_pos]
+        else:
+            self.white = (self.white & ~CELL_BITS[from_pos]) | CELL_BITS[to_pos]
+
+    def unmove(self, from_pos, to_pos, player):
+        self.move(to_pos, from_pos, player)
+
+    # Dict adapter so existing board[pos] / board.items() code keeps working.
+    def __getitem__(self, pos):
+        bit = CELL_BITS[pos]
+        return 'B' if self.black & bit else 'W' if self.white & bit else None
+
+    def __setitem__(self, pos, piece):
+        bit = CELL_BITS[pos]
+        self.black &= ~bit
+        self.white &= ~bit
+        if piece == 'B':
+            self.black |= bit
+        elif piece == 'W':
+            self.white |= bit
+        elif piece is not None:
+            raise ValueError(f"Invalid piece {piece!r}; use 'B', 'W' or None")
+
+    def __delitem__(self, pos):
+        raise TypeError("Board cells cannot be removed; set them to None instead")
+
+    def __iter__(self):
+        return iter(CELLS)
+
+    def __len__(self):
+        return len(CELLS)
+
+    def __contains__(self, pos):
+        return pos in CELL_BITS
+
+    def items(self):
+        return [(cell, self[cell]) for cell in CELLS]
+
+    def __eq__(self, other):
+        if isinstance(other, Bitboard):
+            return self.black == other.black and self.white == other.white
+        return super().__eq__(other)
+
+    def copy(self):
+        return Bitboard(self.black, self.white)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __repr__(self):
+        return repr(self.to_dict())
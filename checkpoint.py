@@ -0,0 +1,45 @@
+import atexit
+import time
+
+
+class CheckpointManager:
+    # Saves only the Q-tables that changed, at most every `interval` seconds or `every_games` games,
+    # and once more on flush()/exit so a crash loses at most one interval of training.
+    def __init__(self, ais, interval=30.0, every_games=None):
+        self.ais = []
+        tables = set()
+        for ai in ais:
+            # Canonical AIs of one type share a table; save it once.
+            if id(ai.q_table) not in tables:
+                tables.add(id(ai.q_table))
+                self.ais.append(ai)
+        self.interval = interval
+        self.every_games = every_games
+        self.games_since_save = 0
+        self.last_save = time.monotonic()
+        self.saves = 0
+        atexit.register(self.flush)
+
+    def tick(self):
+        if self.interval is not None and time.monotonic() - self.last_save >= self.interval:
+            self.flush()
+
+    def game_finished(self):
+        self.games_since_save += 1
+        if self.every_games and self.games_since_save >= self.every_games:
+            self.flush()
+        else:
+            self.tick()
+
+    def flush(self):
+        for ai in self.ais:
+            if ai.q_table.dirty:
+                ai.save_q_table()
+                self.saves += 1
+        self.games_since_save = 0
+        self.last_save = time.monotonic()
+
+    def close(self, save=True):
+        if save:
+            self.flush()
+        atexit.unregister(self.flush)
@@ -0,0 +1,67 @@
+import numpy as np
+from bitboard import NUM_STATES
+
+
+class ConvergenceTracker:
+    # Running statistics fed from update_q_table: |dQ| per window of games, states touched and
+    # greedy-policy changes. Training counts as converged once no update has changed the greedy
+    # move of any state for `stable_games` games in a row.
+    def __init__(self, window=1000, stable_games=0, verbose=True):
+        self.window = window
+        self.stable_games = stable_games
+        self.verbose = verbose
+        self.games = 0
+        self.games_since_change = 0
+        self.touched_ever = np.zeros(NUM_STATES, dtype=bool)
+        self.history = []
+        self.start_window()
+
+    def start_window(self):
+        self.updates = 0
+        self.delta_sum = 0.0
+        self.delta_max = 0.0
+        self.policy_changes = 0
+        self.touched = np.zeros(NUM_STATES, dtype=bool)
+
+    def record(self, q_table, state, actions, action, old_q, new_q):
+        delta = abs(new_q - old_q)
+        self.updates += 1
+        self.delta_sum += delta
+        if delta > self.delta_max:
+            self.delta_max = delta
+        self.touched[state] = True
+        # Only the updated entry moved, together with any move sharing it (the twins of a move in a
+        # symmetric position of a canonical table), so rebuild the values before the update from it.
+        values = q_table.values_for(state, actions)
+        entries = q_table.entries(state, actions)[1]
+        before = np.where(entries == q_table.entries(state, action)[1], old_q, values)
+        if set(entries[before == before.max()]) != set(entries[values == values.max()]):
+            self.policy_changes += 1
+            self.games_since_change = -1  # this game does not count as stable
+
+    def game_finished(self):
+        # Returns True once the policy has been stable for stable_games games.
+        self.games += 1
+        self.games_since_change += 1
+        if self.games % self.window == 0:
+            self.close_window()
+        return bool(self.stable_games) and self.games_since_change >= self.stable_games
+
+    def close_window(self):
+        self.touched_ever |= self.touched
+        stats = {
+            "games": self.games,
+            "updates": self.updates,
+            "mean_delta": self.delta_sum / self.updates if self.updates else 0.0,
+            "max_delta": self.delta_max,
+            "states_touched": int(self.touched.sum()),
+            "states_touched_total": int(self.touched_ever.sum()),
+            "policy_changes": self.policy_changes,
+        }
+        self.history.append(stats)
+        if self.verbose:
+            print(f"Games {self.games - self.window + 1}-{self.games}: mean |dQ| {stats['mean_delta']:.6f}, "
+                  f"max |dQ| {stats['max_delta']:.6f}, states touched {stats['states_touched']} "
+                  f"({stats['states_touched_total']} total), policy changes {stats['policy_changes']}")
+        self.start_window()
+        return stats
@@ -0,0 +1,49 @@
+import argparse
+import glob
+import os
+import pickle
+import sys
+from qtable import DenseQTable, CanonicalQTable, load_table_file
+
+
+def table_class(path):
+    return CanonicalQTable if os.path.splitext(path)[0].endswith("_canonical") else DenseQTable
+
+
+def convert(pickle_file):
+    table = table_class(pickle_file)()
+    with open(pickle_file, 'rb') as f:
+        table.load_legacy(pickle.load(f))
+    q_table_file = os.path.splitext(pickle_file)[0] + ".qtb"
+    table.save(q_table_file)
+    print(f"{pickle_file} -> {q_table_file}: {len(table)} entries, {os.path.getsize(q_table_file) / 1024:.1f} KiB")
+
+
+def export(q_table_file):
+    # Writes the trained table back in the pickled dict layout of the shipped tables; visit counts are not kept.
+    table = load_table_file(q_table_file, table_class(q_table_file))
+    pickle_file = os.path.splitext(q_table_file)[0] + ".pkl"
+    temp_path = f"{pickle_file}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(table.to_legacy(), f)
+    os.replace(temp_path, pickle_file)
+    print(f"{q_table_file} -> {pickle_file}: {len(table)} entries, {os.path.getsize(pickle_file) / 1024:.1f} KiB")
+
+
+def main(argv=None):
+    # By default a one-shot migration of the pickled Q-tables to the memory-mappable .qtb format.
+    parser = argparse.ArgumentParser(description="Convert Q-tables between the pickled .pkl and the binary .qtb format.")
+    parser.add_argument("files", nargs='*', help="Tables to convert (default every q_table*.pkl, or every q_table*.qtb with --to-pickle)")
+    parser.add_argument("--to-pickle", action="store_true", help="Export .qtb tables to .pkl instead")
+    args = parser.parse_args(argv)
+    pattern = "q_table*.qtb" if args.to_pickle else "q_table*.pkl"
+    for path in args.files or sorted(glob.glob(pattern)):
+        if args.to_pickle:
+            export(path)
+        else:
+            convert(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import argparse
+import random
+import sys
+import time
+from collections import deque
+import numpy as np
+from simulator import (HeadlessSimulator, add_simulation_arguments, parse_draw_rule, parse_positions, parse_schedules,
+                       parse_start_distribution)
+from start_positions import DEFAULT_DISTANCES, Curriculum, StartDistribution, setup_state
+from state_graph import get_graph
+from value_iteration import ValueIteration
+
+
+def reachable_states(start_states):
+    # Every position with moves that play can reach from the given starts.
+    graph = get_graph()
+    seen = set(start_states)
+    queue = deque(seen)
+    while queue:
+        for child in graph.successor_lists[queue.popleft()]:
+            if child not in seen and not graph.terminal[child]:
+                seen.add(child)
+                queue.append(child)
+    return np.array(sorted(s for s in seen if graph.moves[s]), dtype=np.intp)
+
+
+class PolicyAgreement:
+    # How far training has converged: the share of reachable positions where every greedy move of the
+    # table is also greedy in the fixed point the Q-learning updates converge to (value_iteration.py).
+    # Positions where every move is equally good in the fixed point are left out.
+    def __init__(self, start_states, discount=0.9, threat_depth=1):
+        self.states = reachable_states(start_states)
+        self.legal = get_graph().as_dense()[self.states] >= 0
+        self.discount = discount
+        self.threat_depth = threat_depth
+        self.optimal = {}
+
+    def fixed_point(self, ai_class):
+        if ai_class not in self.optimal:
+            solver = ValueIteration(ai_class, self.discount, self.threat_depth)
+            solver.solve()
+            q_values = np.where(self.legal, solver.q[self.states], -np.inf)
+            optimal = self.legal & (q_values >= q_values.max(axis=1, keepdims=True) - 1e-6)
+            self.optimal[ai_class] = (optimal, (optimal != self.legal).any(axis=1))
+        return self.optimal[ai_class]
+
+    def measure(self, ai):
+        optimal, decisive = self.fixed_point(type(ai))
+        rows = decisive & ((self.states & 1) == (ai.player == 'W'))
+        legal = self.legal[rows]
+        q_values = ai.q_table.values_matrix(self.states[rows])
+        greedy = legal & (q_values == np.where(legal, q_values, -np.inf).max(axis=1, keepdims=True))
+        return float((~greedy | optimal[rows]).all(axis=1).mean())
+
+
+def train_and_measure(args, black, white, distribution, quality, seed, planning=0):
+    # Trains fresh in-memory tables (the files are never touched) and measures both sides every eval_every games.
+    # With planning, each side also makes up to that many prioritised-sweeping backups after every game.
+    random.seed(seed)
+    simulator = HeadlessSimulator(args.canonical, threat_depth=args.threat_depth, draw_rule=parse_draw_rule(args))
+    simulator.checkpoints.close(save=False)
+    simulator.set_initial_board(black, white, args.first)
+    simulator.set_schedules(*args.schedules)
+    simulator.set_start_distribution(distribution)
+    ais = (simulator.get_ai('B', args.black), simulator.get_ai('W', args.white))
+    tables = {}
+    for ai in ais:
+        ai.q_table = tables.setdefault(ai.q_table_file, type(ai.q_table)())
+        ai.steps = 0
+    if planning:
+        simulator.enable_planning(args.black, args.white, planning, args.planning_threshold)
+    curve = []
+    for games in range(args.eval_every, args.games + 1, args.eval_every):
+        for _ in range(args.eval_every):
+            simulator.play_one_game(args.black, args.white)
+            simulator.plan()
+        curve.append((games, quality.measure(ais[0]), quality.measure(ais[1])))
+    return curve
+
+
+def games_to_reach(curve, black_level, white_level):
+    return next((games for games, black, white in curve if black >= black_level and white >= white_level), None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare endgame-first curriculum and planning against plain self-play.")
+    add_simulation_arguments(parser)
+    parser.add_argument("--stage-games", type=int, default=2000, help="Games per curriculum stage")
+    parser.add_argument("--distances", type=int, nargs='+', default=list(DEFAULT_DISTANCES), help="Curriculum stages, as plies from the end of the game")
+    parser.add_argument("--planning", type=int, default=0, metavar="BACKUPS", help="Also train a scheme with this many prioritised-sweeping backups per AI between games")
+    parser.add_argument("--planning-threshold", type=float, default=1e-4, help="Smallest Q-value change worth propagating to predecessor positions")
+    parser.add_argument("--eval-every", type=int, default=1000, help="Games between policy measurements")
+    parser.add_argument("--target", type=float, help="Also report the games each scheme needs to reach this agreement on both sides")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, the same for both schemes")
+    args = parser.parse_args(argv)
+    black, white = parse_positions(parser, args)
+    if args.stage_games <= 0 or args.eval_every <= 0 or args.games < args.eval_every:
+        parser.error("--stage-games and --eval-every must be positive and --games at least --eval-every.")
+    if args.planning < 0 or args.planning_threshold < 0:
+        parser.error("--planning and --planning-threshold cannot be negative.")
+    args.schedules = parse_schedules(parser, args)
+
+    # Both schemes are judged on the openings they are meant to play: --starts, or the single start position.
+    target = parse_start_distribution(parser, args) or StartDistribution([setup_state(black, white, args.first)], name="the start position")
+    quality = PolicyAgreement(target.states, threat_depth=args.threat_depth)
+    print(f"Measuring agreement with the converged policy on {len(quality.states)} positions reachable from {target.name} "
+          f"(--games {args.games}, seed {args.seed})")
+    curves = {}
+    schemes = ["plain", "curriculum"] + (["planning"] if args.planning else [])
+    for scheme in schemes:
+        distribution = Curriculum(target, args.stage_games, args.distances) if scheme == "curriculum" else parse_start_distribution(parser, args)
+        start = time.perf_counter()
+        curves[scheme] = train_and_measure(args, black, white, distribution, quality, args.seed, args.planning if scheme == "planning" else 0)
+        print(f"{scheme}: {args.games} games in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'games':>8s}" + "".join(f" {scheme[:8] + ' B':>10s} {scheme[:8] + ' W':>10s}" for scheme in schemes))
+    for rows in zip(*(curves[scheme] for scheme in schemes)):
+        print(f"{rows[0][0]:8d}" + "".join(f" {black_quality:10.3f} {white_quality:10.3f}" for _, black_quality, white_quality in rows))
+    # Games to convergence, measured against plain training: how soon each scheme gets as far as plain does in --games.
+    _, plain_black, plain_white = curves["plain"][-1]
+    for scheme in schemes[1:]:
+        games = games_to_reach(curves[scheme], plain_black, plain_white)
+        if games == args.eval_every:
+            # Already there at the first measurement, so the grid only bounds the speed-up from below.
+            print(f"{scheme.capitalize()} reaches plain training's final agreement ({plain_black:.3f} / {plain_white:.3f}) at or before "
+                  f"the first evaluation ({games} games) instead of {args.games}: at least {args.games / games:.1f}x fewer games "
+                  f"(use a smaller --eval-every to measure it)")
+        elif games:
+            print(f"{scheme.capitalize()} reaches plain training's final agreement ({plain_black:.3f} / {plain_white:.3f}) after {games} games "
+                  f"instead of {args.games}: {args.games / games:.1f}x fewer games")
+        else:
+            print(f"{scheme.capitalize()} does not reach plain training's final agreement ({plain_black:.3f} / {plain_white:.3f}) within {args.games} games")
+    if args.target is not None:
+        for scheme, curve in curves.items():
+            games = games_to_reach(curve, args.target, args.target)
+            if games == args.eval_every:
+                games = f"at most {games} (the first evaluation)"
+            print(f"Games to {args.target:.0%} agreement on both sides ({scheme}): {games if games else f'not within {args.games}'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
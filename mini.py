@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-import copy
-from ai_player import BlackVsWhiteAI, SharkAI
+from ai_player import BlackVsWhiteAI, SharkAI, SearchAI, MCTSAI
+from bitboard import Bitboard, CONNECTIONS, WINNING_COMBOS, state_index
+from checkpoint import CheckpointManager
+from repetition import DrawRule, play_and_train
 
 class BlackVsWhiteGame:
     def __init__(self, root):
@@ -13,24 +15,30 @@ class BlackVsWhiteGame:
         self.ai_black_shark = SharkAI(self, 'B')
         self.ai_white_default = BlackVsWhiteAI(self, 'W')
         self.ai_white_shark = SharkAI(self, 'W')
-        self.board = {'1': None, '2': None, '3': None, '4': None, '5': None, '6': None, '7': None, '8': None, 'C': None}
+        self.checkpoints = CheckpointManager([self.ai_black_default, self.ai_black_shark, self.ai_white_default, self.ai_white_shark])
+        # Search orders its moves by the Default tables, MCTS uses them as priors.
+        default_tables = (self.ai_black_default.q_table, self.ai_white_default.q_table)
+        self.ai_black_search = SearchAI(self, 'B', default_tables)
+        self.ai_white_search = SearchAI(self, 'W', default_tables)
+        self.ai_black_mcts = MCTSAI(self, 'B', default_tables)
+        self.ai_white_mcts = MCTSAI(self, 'W', default_tables)
+        self.board = Bitboard()
         self.initial_board = None
         self.initial_first_player = 'B'
         self.current_player = 'B'
         self.history = []
         self.black_wins = 0
         self.white_wins = 0
+        self.draws = 0
+        self.draw_rule = DrawRule()  # ends auto-play games that go round in circles
         self.auto_play_active = False
-        self.connections = {
-            '1': ['C', '2', '8'], '2': ['C', '1', '3'], '3': ['C', '2', '4'], '4': ['C', '3', '5'],
-            '5': ['C', '4', '6'], '6': ['C', '5', '7'], '7': ['C', '6', '8'], '8': ['C', '7', '1'],
-            'C': ['1', '2', '3', '4', '5', '6', '7', '8']
-        }
-        self.winning_combos = [('1', 'C', '5'), ('2', 'C', '6'), ('3', 'C', '7'), ('8', 'C', '4')]
+        self.connections = CONNECTIONS
+        self.winning_combos = WINNING_COMBOS
         self.positions = {
             '1': (200, 50), '2': (300, 100), '3': (350, 200), '4': (300, 300),
             '5': (200, 350), '6': (100, 300), '7': (50, 200), '8': (100, 100), 'C': (200, 200)
         }
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.setup_gui()
         self.choose_starting_state()
 
@@ -41,9 +49,11 @@ class BlackVsWhiteGame:
         self.black_ai_var = tk.StringVar(value="None")
         self.white_ai_var = tk.StringVar(value="None")
         tk.Label(self.moves_frame, text="Black AI:").pack()
-        tk.OptionMenu(self.moves_frame, self.black_ai_var, "None", "Default", "Shark", command=lambda _: self.update_ai()).pack()
+        tk.OptionMenu(self.moves_frame, self.black_ai_var, "None", "Default", "Shark", "Search", "MCTS", command=lambda _: self.update_ai()).pack()
         tk.Label(self.moves_frame, text="White AI:").pack()
-        tk.OptionMenu(self.moves_frame, self.white_ai_var, "None", "Default", "Shark", command=lambda _: self.update_ai()).pack()
+        tk.OptionMenu(self.moves_frame, self.white_ai_var, "None", "Default", "Shark", "Search", "MCTS", command=lambda _: self.update_ai()).pack()
+        self.train_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(self.moves_frame, text="Train AI", variable=self.train_var, command=self.update_training).pack()
         self.inspect_button = tk.Button(self.moves_frame, text="Inspect Q-Table", command=self.inspect_q_table)
         self.inspect_button.pack()
         self.auto_play_button = tk.Button(self.moves_frame, text="Auto Play Games", command=self.auto_play_games)
@@ -54,7 +64,7 @@ class BlackVsWhiteGame:
         self.reset_button.pack()
         self.new_board_button = tk.Button(self.moves_frame, text="New Board", command=self.choose_starting_state)
         self.new_board_button.pack()
-        self.scoreboard_label = tk.Label(self.moves_frame, text="Black: 0 | White: 0", font=("Arial", 12, "bold"))
+        self.scoreboard_label = tk.Label(self.moves_frame, text="Black: 0 | White: 0 | Draws: 0", font=("Arial", 12, "bold"))
         self.scoreboard_label.pack()
         self.moves_frame.pack(side=tk.LEFT, fill=tk.Y)
         self.status_label = tk.Label(self.moves_frame, text="Black's turn", font=("Arial", 12, "bold"))
@@ -75,7 +85,7 @@ class BlackVsWhiteGame:
             self.canvas.create_text(x, y, text=text, font=("Arial", 14), fill=text_color)
 
     def update_scoreboard(self):
-        self.scoreboard_label.config(text=f"Black: {self.black_wins} | White: {self.white_wins}")
+        self.scoreboard_label.config(text=f"Black: {self.black_wins} | White: {self.white_wins} | Draws: {self.draws}")
 
     def choose_starting_state(self):
         black_positions = simpledialog.askstring("Input", "Enter Black's starting positions (e.g., C 3 5):", parent=self.root)
@@ -89,12 +99,12 @@ class BlackVsWhiteGame:
                 all(p in self.board for p in black + white) and 
                 len(set(black + white)) == 6 and 
                 first_player in ['B', 'W']):
-                self.board = {'1': None, '2': None, '3': None, '4': None, '5': None, '6': None, '7': None, '8': None, 'C': None}
+                self.board = Bitboard()
                 for pos in black:
                     self.board[pos] = 'B'
                 for pos in white:
                     self.board[pos] = 'W'
-                self.initial_board = copy.deepcopy(self.board)
+                self.initial_board = self.board.copy()
                 self.initial_first_player = first_player
                 self.current_player = first_player
                 self.history = []
@@ -105,25 +115,16 @@ class BlackVsWhiteGame:
                 self.choose_starting_state()
 
     def get_available_moves(self):
-        moves = []
-        for pos, piece in self.board.items():
-            if piece == self.current_player:
-                for next_pos in self.connections[pos]:
-                    if self.board[next_pos] is None:
-                        moves.append((pos, next_pos))
-        return moves
+        return self.board.available_moves(self.current_player)
 
     def is_winning_move(self, from_pos, to_pos):
-        temp_board = copy.deepcopy(self.board)
-        temp_board[from_pos] = None
-        temp_board[to_pos] = self.current_player
-        return any(all(temp_board[p] == self.current_player for p in combo) for combo in self.winning_combos)
+        return self.board.is_winning_move(from_pos, to_pos, self.current_player)
 
     def get_current_ai(self):
         if self.current_player == 'B':
-            return self.ai_black_default if self.black_ai_choice == "Default" else self.ai_black_shark if self.black_ai_choice == "Shark" else None
+            return self.ai_black_default if self.black_ai_choice == "Default" else self.ai_black_shark if self.black_ai_choice == "Shark" else self.ai_black_search if self.black_ai_choice == "Search" else self.ai_black_mcts if self.black_ai_choice == "MCTS" else None
         else:
-            return self.ai_white_default if self.white_ai_choice == "Default" else self.ai_white_shark if self.white_ai_choice == "Shark" else None
+            return self.ai_white_default if self.white_ai_choice == "Default" else self.ai_white_shark if self.white_ai_choice == "Shark" else self.ai_white_search if self.white_ai_choice == "Search" else self.ai_white_mcts if self.white_ai_choice == "MCTS" else None
 
     def update_moves(self):
         self.moves_listbox.delete(0, tk.END)
@@ -152,15 +153,13 @@ class BlackVsWhiteGame:
             move_text = self.moves_listbox.get(selection[0])
             move = move_text.split()[0:3:2]  # Extract from_pos and to_pos, ignoring Q-value
             from_pos, to_pos = move[0], move[1]
-            old_board = copy.deepcopy(self.board)
-            self.history.append((old_board, self.current_player))
-            self.board[from_pos] = None
-            self.board[to_pos] = self.current_player
+            old_state = state_index(self.board, self.current_player)
+            self.apply_move(from_pos, to_pos)
             self.draw_board()
             ai = self.get_current_ai()
             if ai:
                 reward = 1.0 if self.check_winner() and self.current_player == ai.player else -0.1 if not self.get_available_moves() else 0.0
-                ai.train(old_board, (from_pos, to_pos), reward, self.board)
+                ai.train(old_state, (from_pos, to_pos), reward, state_index(self.board, self.current_player))
             if self.check_winner():
                 if self.current_player == 'B':
                     self.black_wins += 1
@@ -169,10 +168,7 @@ class BlackVsWhiteGame:
                 self.update_scoreboard()
                 messagebox.showinfo("Game Over", f"{'Black' if self.current_player == 'B' else 'White'} wins!")
                 self.moves_listbox.delete(0, tk.END)
-                self.ai_black_default.save_q_table()
-                self.ai_black_shark.save_q_table()
-                self.ai_white_default.save_q_table()
-                self.ai_white_shark.save_q_table()
+                self.checkpoints.game_finished()
                 return
             self.current_player = 'W' if self.current_player == 'B' else 'B'
             self.update_moves()
@@ -180,11 +176,17 @@ class BlackVsWhiteGame:
                 self.root.after(500, self.make_ai_move)
 
     def check_winner(self):
-        return any(all(self.board[pos] == self.current_player for pos in combo) for combo in self.winning_combos)
+        return self.board.has_won(self.current_player)
+
+    def apply_move(self, from_pos, to_pos):
+        # History keeps only (from, to, player) deltas; undo plays them backwards.
+        self.history.append((from_pos, to_pos, self.current_player))
+        self.board.move(from_pos, to_pos, self.current_player)
 
     def undo_move(self):
         if self.history:
-            self.board, self.current_player = self.history.pop()
+            from_pos, to_pos, self.current_player = self.history.pop()
+            self.board.unmove(from_pos, to_pos, self.current_player)
             self.draw_board()
             self.update_moves()
 
@@ -200,13 +202,11 @@ class BlackVsWhiteGame:
             move = ai.get_best_move()
             if move:
                 from_pos, to_pos = move
-                old_board = copy.deepcopy(self.board)
-                self.history.append((old_board, self.current_player))
-                self.board[from_pos] = None
-                self.board[to_pos] = self.current_player
+                old_state = state_index(self.board, self.current_player)
+                self.apply_move(from_pos, to_pos)
                 self.draw_board()
                 reward = 1.0 if self.check_winner() and self.current_player == ai.player else -0.1 if not self.get_available_moves() else 0.0
-                ai.train(old_board, move, reward, self.board)
+                ai.train(old_state, move, reward, state_index(self.board, self.current_player))
                 if self.check_winner():
                     if self.current_player == 'B':
                         self.black_wins += 1
@@ -215,19 +215,19 @@ class BlackVsWhiteGame:
                     self.update_scoreboard()
                     messagebox.showinfo("Game Over", f"{'Black' if self.current_player == 'B' else 'White'} wins!")
                     self.moves_listbox.delete(0, tk.END)
-                    self.ai_black_default.save_q_table()
-                    self.ai_black_shark.save_q_table()
-                    self.ai_white_default.save_q_table()
-                    self.ai_white_shark.save_q_table()
+                    self.checkpoints.game_finished()
                     return
                 self.current_player = 'W' if self.current_player == 'B' else 'B'
                 self.update_moves()
                 if self.get_current_ai():
                     self.root.after(500, self.make_ai_move)
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.tick()
+
+    def update_training(self):
+        training = self.train_var.get()
+        for ai in (self.ai_black_default, self.ai_black_shark, self.ai_white_default, self.ai_white_shark):
+            ai.set_training(training)
+        self.update_moves()
 
     def inspect_q_table(self):
         choice = simpledialog.askstring("Input", "Inspect which Q-Table? (B for Black Default, BS for Black Shark, W for White Default, WS for White Shark):", parent=self.root)
@@ -242,9 +242,13 @@ class BlackVsWhiteGame:
         else:
             messagebox.showerror("Error", "Invalid choice. Enter 'B', 'BS', 'W', or 'WS'.")
 
+    def on_close(self):
+        self.checkpoints.close()
+        self.root.destroy()
+
     def reset_to_initial(self):
         if self.initial_board:
-            self.board = copy.deepcopy(self.initial_board)
+            self.board = self.initial_board.copy()
             self.current_player = self.initial_first_player
             self.history = []
             self.draw_board()
@@ -264,6 +268,7 @@ class BlackVsWhiteGame:
 
     def abort_auto_play(self):
         self.auto_play_active = False
+        self.checkpoints.flush()
         self.auto_play_button.config(state=tk.NORMAL)
         self.abort_button.config(state=tk.DISABLED)
         self.reset_to_initial()
@@ -274,14 +279,12 @@ class BlackVsWhiteGame:
             self.auto_play_active = False
             self.auto_play_button.config(state=tk.NORMAL)
             self.abort_button.config(state=tk.DISABLED)
-            messagebox.showinfo("Auto Play Complete", f"Completed {games_played} games!\nBlack: {self.black_wins} | White: {self.white_wins}")
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            messagebox.showinfo("Auto Play Complete", f"Completed {games_played} games!\nBlack: {self.black_wins} | White: {self.white_wins} | Draws: {self.draws}")
+            self.checkpoints.flush()
             self.reset_to_initial()
             return
         self.reset_to_initial()
+        self.draw_rule.new_game(state_index(self.board, self.current_player))
         print(f"Starting game {games_played + 1}/{total_games}")
         self.play_one_auto_game(total_games, games_played)
 
@@ -301,10 +304,7 @@ class BlackVsWhiteGame:
                 print(f"Game {games_played + 1} ended: {winner} wins")
             else:
                 print(f"Game {games_played + 1} ended: No moves available")
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.game_finished()
             self.root.after(1000, lambda: self.auto_play_loop(total_games, games_played + 1))
             return
         ai = self.get_current_ai()
@@ -315,20 +315,12 @@ class BlackVsWhiteGame:
         move = ai.get_best_move()
         if not move:
             print(f"No valid moves for {self.current_player} in game {games_played + 1}")
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.game_finished()
             self.root.after(1000, lambda: self.auto_play_loop(total_games, games_played + 1))
             return
         from_pos, to_pos = move
-        old_board = copy.deepcopy(self.board)
-        self.history.append((old_board, self.current_player))
-        self.board[from_pos] = None
-        self.board[to_pos] = self.current_player
+        reward, draw = play_and_train(self, ai, move)
         self.draw_board()
-        reward = 1.0 if self.check_winner() and self.current_player == ai.player else -0.1 if not self.get_available_moves() else 0.0
-        ai.train(old_board, move, reward, self.board)
         print(f"Game {games_played + 1}: {self.current_player} moved {from_pos} to {to_pos}, Reward: {reward}")
         if self.check_winner():
             winner = 'Black' if self.current_player == 'B' else 'White'
@@ -338,10 +330,14 @@ class BlackVsWhiteGame:
                 self.white_wins += 1
             self.update_scoreboard()
             print(f"Game {games_played + 1} ended: {winner} wins")
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.game_finished()
+            self.root.after(1000, lambda: self.auto_play_loop(total_games, games_played + 1))
+            return
+        if draw:
+            self.draws += 1
+            self.update_scoreboard()
+            print(f"Game {games_played + 1} ended: Draw")
+            self.checkpoints.game_finished()
             self.root.after(1000, lambda: self.auto_play_loop(total_games, games_played + 1))
             return
         self.current_player = 'W' if self.current_player == 'B' else 'B'
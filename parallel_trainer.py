@@ -0,0 +1,148 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+import numpy as np
+from simulator import HeadlessSimulator, add_simulation_arguments, parse_draw_rule, parse_positions, parse_schedules, parse_start_distribution
+
+_simulator = None
+
+
+def training_ais(simulator, black_choice, white_choice):
+    # Keyed by table file: with canonical tables both sides of one AI type share a single table.
+    ais = {}
+    for player, choice in (('B', black_choice), ('W', white_choice)):
+        ai = simulator.get_ai(player, choice)
+        ais.setdefault(ai.q_table_file, ai)
+    return ais
+
+
+def _init_worker(canonical, threat_depth, draw_rule, schedules, start_distribution, black, white, first_player):
+    global _simulator
+    _simulator = HeadlessSimulator(canonical, threat_depth=threat_depth, draw_rule=draw_rule)
+    # Workers only train on snapshots; the master owns the files.
+    _simulator.checkpoints.close(save=False)
+    _simulator.set_initial_board(black, white, first_player)
+    _simulator.set_schedules(*schedules)
+    _simulator.set_start_distribution(start_distribution)
+
+
+def _play_chunk(task):
+    snapshot, games, black_choice, white_choice, seed = task
+    random.seed(seed)
+    ais = training_ais(_simulator, black_choice, white_choice)
+    for q_table_file, ai in ais.items():
+        values, seen, visits = snapshot[q_table_file]
+        ai.q_table.values[:] = values
+        ai.q_table.seen[:] = seen
+        # Schedules need the master's counts; only this chunk's visits are sent back.
+        ai.q_table.visits[:] = visits
+    for ai in (_simulator.ai_black_default, _simulator.ai_black_shark, _simulator.ai_white_default, _simulator.ai_white_shark):
+        ai.steps = int(ai.q_table.visits.sum())
+    _simulator.black_wins = _simulator.white_wins = _simulator.draws = 0
+    _simulator.start_stats = {}
+    for _ in range(games):
+        winner = _simulator.play_one_game(black_choice, white_choice)
+        if _simulator.start_distribution:
+            _simulator.record_start(winner)
+    tables = {q_table_file: (ai.q_table.values, ai.q_table.seen, ai.q_table.visits - snapshot[q_table_file][2]) for q_table_file, ai in ais.items()}
+    return tables, _simulator.black_wins, _simulator.white_wins, _simulator.draws, _simulator.start_stats
+
+
+def merge_tables(master, results):
+    # Visit-weighted average of the workers' Q-values; entries no worker visited keep the master value.
+    weighted = np.zeros(master.values.shape, dtype=np.float64)
+    visits = np.zeros(master.values.shape, dtype=np.int64)
+    for values, seen, worker_visits in results:
+        weighted += values * worker_visits
+        visits += worker_visits
+        master.seen |= seen
+    visited = visits > 0
+    master.values[visited] = weighted[visited] / visits[visited]
+    master.visits += visits.astype(np.uint32)
+    master.dirty = True
+
+
+class ParallelTrainer:
+    def __init__(self, workers, canonical=False, threat_depth=1, draw_rule=None, schedules=(None, None), start_distribution=None):
+        self.workers = workers
+        self.canonical = canonical
+        self.threat_depth = threat_depth
+        self.master = HeadlessSimulator(canonical, threat_depth=threat_depth, draw_rule=draw_rule)
+        self.draw_rule = self.master.draw_rule
+        self.schedules = schedules  # (epsilon, learning rate) schedules, None for the fixed values
+        self.master.set_start_distribution(start_distribution)
+        self.black_wins = 0
+        self.white_wins = 0
+        self.draws = 0
+        self.merge_time = 0.0
+        self.save_time = 0.0
+
+    def run(self, num_games, black, white, first_player, black_choice, white_choice, sync_every):
+        ais = training_ais(self.master, black_choice, white_choice)
+        games_played = 0
+        start = time.perf_counter()
+        pool = multiprocessing.Pool(self.workers, _init_worker, (self.canonical, self.threat_depth, self.draw_rule, self.schedules, self.master.start_distribution, black, white, first_player))
+        try:
+            while games_played < num_games:
+                round_games = min(num_games - games_played, sync_every * self.workers)
+                chunks = [round_games // self.workers + (1 if i < round_games % self.workers else 0) for i in range(self.workers)]
+                snapshot = {q_table_file: (ai.q_table.values, ai.q_table.seen, ai.q_table.visits) for q_table_file, ai in ais.items()}
+                tasks = [(snapshot, games, black_choice, white_choice, random.getrandbits(32)) for games in chunks if games]
+                results = pool.map(_play_chunk, tasks)
+
+                merge_start = time.perf_counter()
+                for q_table_file, ai in ais.items():
+                    merge_tables(ai.q_table, [tables[q_table_file] for tables, _, _, _, _ in results])
+                self.merge_time += time.perf_counter() - merge_start
+                for _, black_wins, white_wins, draws, start_stats in results:
+                    self.black_wins += black_wins
+                    self.white_wins += white_wins
+                    self.draws += draws
+                    self.master.merge_start_stats(start_stats)
+                games_played += round_games
+
+                save_start = time.perf_counter()
+                for ai in ais.values():
+                    ai.save_q_table()
+                self.save_time += time.perf_counter() - save_start
+                print(f"Merged {games_played}/{num_games} games | Black: {self.black_wins} | White: {self.white_wins} | Draws: {self.draws}")
+        except KeyboardInterrupt:
+            pool.terminate()
+            print("Training aborted, keeping the tables from the last merge")
+        else:
+            pool.close()
+        pool.join()
+
+        elapsed = time.perf_counter() - start
+        rate = games_played / elapsed if elapsed > 0 else 0.0
+        print(f"Completed {games_played} games on {self.workers} workers in {elapsed:.2f}s ({rate:.1f} games/sec)")
+        print(f"Merge time: {self.merge_time:.3f}s | Save time: {self.save_time:.3f}s")
+        if self.master.start_distribution:
+            self.master.report_starts()
+        return games_played
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel Black vs. White self-play trainer.")
+    add_simulation_arguments(parser)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--sync-every", type=int, default=2000, help="Games each worker plays between merges")
+    parser.add_argument("--start-stats", help="With --starts, write per-start-position results to this JSON file")
+    args = parser.parse_args(argv)
+    black, white = parse_positions(parser, args)
+    if args.workers <= 0 or args.sync_every <= 0:
+        parser.error("--workers and --sync-every must be positive.")
+
+    trainer = ParallelTrainer(args.workers, args.canonical, args.threat_depth, parse_draw_rule(args), parse_schedules(parser, args),
+                              parse_start_distribution(parser, args))
+    trainer.run(args.games, black, white, args.first, args.black, args.white, args.sync_every)
+    if args.start_stats and trainer.master.start_distribution:
+        trainer.master.write_start_stats(args.start_stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
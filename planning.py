@@ -0,0 +1,66 @@
+import heapq
+import numpy as np
+from bitboard import NUM_STATES
+from value_iteration import ValueIteration
+
+
+class PrioritizedSweeping:
+    # Dyna-style planning for one AI. Moves are deterministic, so the model is exact: the reward of
+    # every move (as in ValueIteration) and the position it leads to, keyed to the mover as in train.
+    # Real updates queue their state by how much its Q-value moved; plan() pops the biggest changes
+    # and gives every (state, action) leading there a full backup, queueing those states in turn.
+    # Planning backups are not counted as visits, which stay a record of real play, but they go to
+    # the AI's convergence tracker like real updates, since they can change the greedy policy too.
+    def __init__(self, ai, budget=1000, threshold=1e-4):
+        self.ai = ai
+        self.budget = budget  # backups per plan() call
+        self.threshold = threshold  # smaller changes are not worth queueing
+        model = ValueIteration(type(ai), ai.discount_factor, getattr(ai, "threat_depth", 1))
+        self.discount = model.discount
+        self.reward = model.reward.tolist()
+        self.action_arrays = ai.graph.action_arrays
+        # predecessors[x]: the moves of this AI's side whose backup reads the value of x.
+        side = ai.player == 'W'
+        states = np.arange(NUM_STATES)
+        rows, cols = np.nonzero(model.active & ~model.no_future & ((states & 1) == side)[:, None])
+        self.predecessors = [[] for _ in range(NUM_STATES)]
+        for state, action, target in zip(rows.tolist(), cols.tolist(), model.own_view[rows, cols].tolist()):
+            self.predecessors[target].append((state, action))
+        self.queue = []
+        self.priority = {}  # state -> priority of its live queue entry; older heap entries are skipped
+        self.backups = 0
+
+    def push(self, state, priority):
+        if priority > self.priority.get(state, self.threshold):
+            self.priority[state] = priority
+            heapq.heappush(self.queue, (-priority, state))
+
+    def record(self, state, delta):
+        # Called by update_q_table after every real update.
+        self.push(state, delta)
+
+    def plan(self):
+        q_table = self.ai.q_table
+        values, seen = q_table.values, q_table.seen
+        tracker = self.ai.tracker
+        backups = 0
+        while self.queue and backups < self.budget:
+            priority, state = heapq.heappop(self.queue)
+            if self.priority.get(state) != -priority:
+                continue
+            del self.priority[state]
+            future = self.discount * q_table.max_value(state, self.action_arrays[state])
+            for predecessor, action in self.predecessors[state]:
+                entry = q_table.entries(predecessor, action)
+                old_q = float(values[entry])
+                new_q = self.reward[predecessor][action] + future
+                values[entry] = new_q
+                seen[entry] = True
+                if tracker is not None:
+                    tracker.record(q_table, predecessor, self.action_arrays[predecessor], action, old_q, new_q)
+                backups += 1
+                self.push(predecessor, abs(new_q - old_q))
+        if backups:
+            q_table.dirty = True
+        self.backups += backups
+        return backups
@@ -1,13 +1,14 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-import copy
-from ai_player import BlackVsWhiteAI, SharkAI
+from ai_player import BlackVsWhiteAI, SharkAI, PerfectAI, SearchAI, MCTSAI
+from bitboard import Bitboard, CONNECTIONS, WINNING_COMBOS, state_index
+from checkpoint import CheckpointManager
 
 class BlackVsWhitePlay:
     def __init__(self, root):
         self.root = root
         self.root.title("Black vs. White")
-        self.board = {'1': None, '2': None, '3': None, '4': None, '5': None, '6': None, '7': None, '8': None, 'C': None}
+        self.board = Bitboard()
         self.initial_board = None
         self.initial_first_player = 'B'
         self.current_player = 'B'
@@ -18,18 +19,24 @@ class BlackVsWhitePlay:
         self.ai_black_shark = SharkAI(self, 'B')
         self.ai_white_default = BlackVsWhiteAI(self, 'W')
         self.ai_white_shark = SharkAI(self, 'W')
+        self.checkpoints = CheckpointManager([self.ai_black_default, self.ai_black_shark, self.ai_white_default, self.ai_white_shark])
+        self.ai_black_perfect = PerfectAI(self, 'B')
+        self.ai_white_perfect = PerfectAI(self, 'W')
+        # Search orders its moves by the Default tables, MCTS uses them as priors.
+        default_tables = (self.ai_black_default.q_table, self.ai_white_default.q_table)
+        self.ai_black_search = SearchAI(self, 'B', default_tables)
+        self.ai_white_search = SearchAI(self, 'W', default_tables)
+        self.ai_black_mcts = MCTSAI(self, 'B', default_tables)
+        self.ai_white_mcts = MCTSAI(self, 'W', default_tables)
         self.ai_side = None  # 'B' or 'W' for AI-controlled side
-        self.ai_type = "None"  # "None", "Default", or "Shark"
-        self.connections = {
-            '1': ['C', '2', '8'], '2': ['C', '1', '3'], '3': ['C', '2', '4'], '4': ['C', '3', '5'],
-            '5': ['C', '4', '6'], '6': ['C', '5', '7'], '7': ['C', '6', '8'], '8': ['C', '7', '1'],
-            'C': ['1', '2', '3', '4', '5', '6', '7', '8']
-        }
-        self.winning_combos = [('1', 'C', '5'), ('2', 'C', '6'), ('3', 'C', '7'), ('8', 'C', '4')]
+        self.ai_type = "None"  # "None", or a side plus "Default", "Shark", "Perfect", "Search" or "MCTS"
+        self.connections = CONNECTIONS
+        self.winning_combos = WINNING_COMBOS
         self.positions = {
             '1': (200, 50), '2': (300, 100), '3': (350, 200), '4': (300, 300),
             '5': (200, 350), '6': (100, 300), '7': (50, 200), '8': (100, 100), 'C': (200, 200)
         }
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.setup_gui()
         self.choose_starting_state()
 
@@ -39,7 +46,9 @@ class BlackVsWhitePlay:
         self.controls_frame = tk.Frame(self.root)
         tk.Label(self.controls_frame, text="AI Side and Type:").pack()
         self.ai_var = tk.StringVar(value="None")
-        tk.OptionMenu(self.controls_frame, self.ai_var, "None", "Black Default", "Black Shark", "White Default", "White Shark", command=self.update_ai).pack()
+        tk.OptionMenu(self.controls_frame, self.ai_var, "None", "Black Default", "Black Shark", "Black Perfect", "Black Search", "Black MCTS", "White Default", "White Shark", "White Perfect", "White Search", "White MCTS", command=self.update_ai).pack()
+        self.train_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(self.controls_frame, text="Train AI", variable=self.train_var, command=self.update_training).pack()
         self.inspect_button = tk.Button(self.controls_frame, text="Inspect Q-Table", command=self.inspect_q_table)
         self.inspect_button.pack()
         self.new_game_button = tk.Button(self.controls_frame, text="New Game", command=self.choose_starting_state)
@@ -81,12 +90,12 @@ class BlackVsWhitePlay:
                 all(p in self.board for p in black + white) and 
                 len(set(black + white)) == 6 and 
                 first_player in ['B', 'W']):
-                self.board = {'1': None, '2': None, '3': None, '4': None, '5': None, '6': None, '7': None, '8': None, 'C': None}
+                self.board = Bitboard()
                 for pos in black:
                     self.board[pos] = 'B'
                 for pos in white:
                     self.board[pos] = 'W'
-                self.initial_board = copy.deepcopy(self.board)
+                self.initial_board = self.board.copy()
                 self.initial_first_player = first_player
                 self.current_player = first_player
                 self.history = []
@@ -99,22 +108,13 @@ class BlackVsWhitePlay:
                 self.choose_starting_state()
 
     def get_available_moves(self):
-        moves = []
-        for pos, piece in self.board.items():
-            if piece == self.current_player:
-                for next_pos in self.connections[pos]:
-                    if self.board[next_pos] is None:
-                        moves.append((pos, next_pos))
-        return moves
+        return self.board.available_moves(self.current_player)
 
     def is_winning_move(self, from_pos, to_pos):
-        temp_board = copy.deepcopy(self.board)
-        temp_board[from_pos] = None
-        temp_board[to_pos] = self.current_player
-        return any(all(temp_board[p] == self.current_player for p in combo) for combo in self.winning_combos)
+        return self.board.is_winning_move(from_pos, to_pos, self.current_player)
 
     def check_winner(self):
-        return any(all(self.board[pos] == self.current_player for pos in combo) for combo in self.winning_combos)
+        return self.board.has_won(self.current_player)
 
     def get_current_ai(self):
         if self.ai_side == self.current_player:
@@ -122,10 +122,22 @@ class BlackVsWhitePlay:
                 return self.ai_black_default
             elif self.ai_type == "Black Shark":
                 return self.ai_black_shark
+            elif self.ai_type == "Black Perfect":
+                return self.ai_black_perfect
+            elif self.ai_type == "Black Search":
+                return self.ai_black_search
+            elif self.ai_type == "Black MCTS":
+                return self.ai_black_mcts
             elif self.ai_type == "White Default":
                 return self.ai_white_default
             elif self.ai_type == "White Shark":
                 return self.ai_white_shark
+            elif self.ai_type == "White Perfect":
+                return self.ai_white_perfect
+            elif self.ai_type == "White Search":
+                return self.ai_white_search
+            elif self.ai_type == "White MCTS":
+                return self.ai_white_mcts
         return None
 
     def update_moves(self):
@@ -155,15 +167,13 @@ class BlackVsWhitePlay:
             move_text = self.moves_listbox.get(selection[0])
             move = move_text.split()[0:3:2]  # Extract from_pos and to_pos, ignoring Q-value
             from_pos, to_pos = move[0], move[1]
-            old_board = copy.deepcopy(self.board)
-            self.history.append((old_board, self.current_player))
-            self.board[from_pos] = None
-            self.board[to_pos] = self.current_player
+            old_state = state_index(self.board, self.current_player)
+            self.apply_move(from_pos, to_pos)
             self.draw_board()
             ai = self.get_current_ai()
             if ai:
                 reward = 1.0 if self.check_winner() and self.current_player == ai.player else -0.1 if not self.get_available_moves() else 0.0
-                ai.train(old_board, (from_pos, to_pos), reward, self.board)
+                ai.train(old_state, (from_pos, to_pos), reward, state_index(self.board, self.current_player))
             if self.check_winner():
                 if self.current_player == 'B':
                     self.black_wins += 1
@@ -172,19 +182,22 @@ class BlackVsWhitePlay:
                 self.update_scoreboard()
                 messagebox.showinfo("Game Over", f"{'Black' if self.current_player == 'B' else 'White'} wins!")
                 self.moves_listbox.delete(0, tk.END)
-                self.ai_black_default.save_q_table()
-                self.ai_black_shark.save_q_table()
-                self.ai_white_default.save_q_table()
-                self.ai_white_shark.save_q_table()
+                self.checkpoints.game_finished()
                 return
             self.current_player = 'W' if self.current_player == 'B' else 'B'
             self.update_moves()
             if self.get_current_ai():
                 self.root.after(500, self.make_ai_move)
 
+    def apply_move(self, from_pos, to_pos):
+        # History keeps only (from, to, player) deltas; undo plays them backwards.
+        self.history.append((from_pos, to_pos, self.current_player))
+        self.board.move(from_pos, to_pos, self.current_player)
+
     def undo_move(self):
         if self.history:
-            self.board, self.current_player = self.history.pop()
+            from_pos, to_pos, self.current_player = self.history.pop()
+            self.board.unmove(from_pos, to_pos, self.current_player)
             self.draw_board()
             self.update_moves()
             if self.get_current_ai():
@@ -207,13 +220,11 @@ class BlackVsWhitePlay:
             move = ai.get_best_move()
             if move:
                 from_pos, to_pos = move
-                old_board = copy.deepcopy(self.board)
-                self.history.append((old_board, self.current_player))
-                self.board[from_pos] = None
-                self.board[to_pos] = self.current_player
+                old_state = state_index(self.board, self.current_player)
+                self.apply_move(from_pos, to_pos)
                 self.draw_board()
                 reward = 1.0 if self.check_winner() and self.current_player == ai.player else -0.1 if not self.get_available_moves() else 0.0
-                ai.train(old_board, move, reward, self.board)
+                ai.train(old_state, move, reward, state_index(self.board, self.current_player))
                 if self.check_winner():
                     if self.current_player == 'B':
                         self.black_wins += 1
@@ -222,19 +233,19 @@ class BlackVsWhitePlay:
                     self.update_scoreboard()
                     messagebox.showinfo("Game Over", f"{'Black' if self.current_player == 'B' else 'White'} wins!")
                     self.moves_listbox.delete(0, tk.END)
-                    self.ai_black_default.save_q_table()
-                    self.ai_black_shark.save_q_table()
-                    self.ai_white_default.save_q_table()
-                    self.ai_white_shark.save_q_table()
+                    self.checkpoints.game_finished()
                     return
                 self.current_player = 'W' if self.current_player == 'B' else 'B'
                 self.update_moves()
                 if self.get_current_ai():
                     self.root.after(500, self.make_ai_move)
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.tick()
+
+    def update_training(self):
+        training = self.train_var.get()
+        for ai in (self.ai_black_default, self.ai_black_shark, self.ai_white_default, self.ai_white_shark):
+            ai.set_training(training)
+        self.update_moves()
 
     def inspect_q_table(self):
         choice = simpledialog.askstring("Input", "Inspect which Q-Table? (B for Black Default, BS for Black Shark, W for White Default, WS for White Shark):", parent=self.root)
@@ -249,9 +260,13 @@ class BlackVsWhitePlay:
         else:
             messagebox.showerror("Error", "Invalid choice. Enter 'B', 'BS', 'W', or 'WS'.")
 
+    def on_close(self):
+        self.checkpoints.close()
+        self.root.destroy()
+
     def reset_to_initial(self):
         if self.initial_board:
-            self.board = copy.deepcopy(self.initial_board)
+            self.board = self.initial_board.copy()
             self.current_player = self.initial_first_player
             self.history = []
             self.draw_board()
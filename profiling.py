@@ -0,0 +1,98 @@
+import atexit
+import cProfile
+import time
+from collections import defaultdict
+
+
+class Instrumentation:
+    # Opt-in per-phase timing: attach() swaps the instance's methods for timed wrappers, so a run
+    # without instrumentation executes exactly the same code as before.
+    def __init__(self, profile_window=None, profile_file="simulator.prof"):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.profile_window = profile_window  # (first, last) game numbers, 1-based and inclusive
+        self.profile_file = profile_file
+        self.profiler = None
+        self.profile_dumped = False
+        self.games = 0
+        self.started = time.perf_counter()
+        self.reported = False
+
+    def timed(self, phase, fn):
+        totals, calls, clock = self.totals, self.calls, time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                totals[phase] += clock() - start
+                calls[phase] += 1
+        return wrapper
+
+    def wrap(self, obj, name, phase):
+        if hasattr(obj, name):
+            setattr(obj, name, self.timed(phase, getattr(obj, name)))
+
+    def attach(self, simulator):
+        ais = [simulator.ai_black_default, simulator.ai_black_shark, simulator.ai_white_default, simulator.ai_white_shark]
+        for ai in ais:
+            kind = type(ai).__name__
+            self.wrap(ai, 'get_best_move', f"{kind}.get_best_move")
+            # SharkAI.train includes the threat-table lookup on top of update_q_table.
+            self.wrap(ai, 'train', f"{kind}.train")
+            self.wrap(ai, 'update_q_table', f"{kind}.update_q_table")
+            self.wrap(ai, 'save_q_table', f"{kind}.save_q_table")
+        for name in ('get_available_moves', 'check_winner', 'apply_move', 'play_one_game', 'run_simulation_loop'):
+            self.wrap(simulator, name, name)
+        self.wrap(simulator.checkpoints, 'flush', "checkpoint flush")
+        game_finished = simulator.checkpoints.game_finished
+
+        def count_game():
+            self.games += 1
+            self.profile_step()
+            game_finished()
+        simulator.checkpoints.game_finished = count_game
+        self.profile_step()
+        # GUI runs have no natural end in code; print the summary when the interpreter exits.
+        atexit.register(self.report)
+        return self
+
+    def profile_step(self):
+        if not self.profile_window or self.profile_dumped:
+            return
+        first, last = self.profile_window
+        if self.profiler is None and self.games == first - 1:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profiler is not None and self.games >= last:
+            self.dump_profile()
+
+    def dump_profile(self):
+        self.profiler.disable()
+        self.profiler.dump_stats(self.profile_file)
+        self.profile_dumped = True
+        first, last = self.profile_window
+        print(f"cProfile stats for games {first}-{min(last, self.games)} written to {self.profile_file} (python -m pstats {self.profile_file})")
+
+    def report(self):
+        if self.reported:
+            return
+        self.reported = True
+        if self.profiler is not None and not self.profile_dumped:
+            self.dump_profile()
+        wall = time.perf_counter() - self.started
+        print(f"Instrumentation: {self.games} games in {wall:.2f}s (phases are inclusive, so nested phases overlap)")
+        print(f"{'phase':32s} {'calls':>10s} {'total s':>10s} {'% wall':>7s} {'us/call':>10s}")
+        for phase, total in sorted(self.totals.items(), key=lambda item: -item[1]):
+            calls = self.calls[phase]
+            print(f"{phase:32s} {calls:10d} {total:10.3f} {100 * total / wall if wall else 0.0:6.1f}% {1e6 * total / calls:10.2f}")
+
+
+def parse_window(text):
+    first, _, last = text.partition(':')
+    first = int(first)
+    last = int(last) if last else first
+    if first < 1 or last < first:
+        raise ValueError("Profile window must be FIRST:LAST with 1 <= FIRST <= LAST")
+    return first, last
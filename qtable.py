@@ -0,0 +1,297 @@
+import os
+import pickle
+import struct
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+import numpy as np
+from bitboard import (ACTIONS, ACTION_INDEX, NUM_ACTIONS, NUM_STATES, CANONICAL_ACTION, CANONICAL_STATE, Bitboard,
+                      state_index, index_to_state)
+
+# Binary .qtb layout: a fixed 64-byte header, then values (float32), seen (bool) and visits (uint32),
+# each a row-major (NUM_STATES x NUM_ACTIONS) array, so the file maps straight onto the table.
+QTB_MAGIC = b"BWQT"
+QTB_VERSION = 1
+QTB_HEADER = struct.Struct("<4sHHII")  # magic, version, flags, number of states, number of actions
+QTB_FIELDS = ("magic", "version", "flags", "number of states", "number of actions")
+QTB_DATA_OFFSET = 64
+QTB_SIZE = QTB_DATA_OFFSET + NUM_STATES * NUM_ACTIONS * (4 + 1 + 4)
+QTB_CANONICAL = 1
+QTB_MERGED_ACTIONS = 2  # canonical tables that also share equivalent moves within a symmetric position
+
+ALL_ACTIONS = np.arange(NUM_ACTIONS)
+CANONICAL_STATES = np.array(CANONICAL_STATE, dtype=np.intp)
+CANONICAL_ACTIONS = np.array(CANONICAL_ACTION, dtype=np.intp)
+
+
+def to_legacy_key(state):
+    # Pickled tables keep the original ((('1', piece), ..., ('C', piece)), player) layout.
+    board, player = index_to_state(state)
+    return (tuple(board.items()), player)
+
+
+def from_legacy_key(legacy_state):
+    board_tuple, player = legacy_state
+    return state_index(Bitboard.from_dict(dict(board_tuple)), player)
+
+
+def read_header(path):
+    # Header fields of a .qtb file; ValueError if it is too short to be one.
+    with open(path, 'rb') as f:
+        header = f.read(QTB_HEADER.size)
+    if len(header) < QTB_HEADER.size:
+        raise ValueError(f"{path}: not a Q-table file (only {len(header)} bytes)")
+    return QTB_HEADER.unpack(header)
+
+
+class DenseQTable:
+    flags = 0
+
+    def __init__(self, values=None, seen=None, visits=None):
+        self.values = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.float32) if values is None else values
+        # Which entries have ever been written, so exports stay as sparse as the old dicts.
+        self.seen = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=bool) if seen is None else seen
+        # How many Q-learning updates each entry has received.
+        self.visits = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.uint32) if visits is None else visits
+        # Set by every write and cleared by a save, so checkpoints skip unchanged tables.
+        self.dirty = False
+
+    def entry(self, state, action):
+        return state, ACTION_INDEX[action]
+
+    def entries(self, states, actions):
+        # Vectorised form of entry() for arrays of states and action indices.
+        return states, actions
+
+    def values_matrix(self, states):
+        # Q-values of every action for each state, columns in raw action order.
+        return self.values[states]
+
+    def __getitem__(self, key):
+        return float(self.values[self.entry(*key)])
+
+    def __setitem__(self, key, q_value):
+        entry = self.entry(*key)
+        self.values[entry] = q_value
+        self.seen[entry] = True
+        self.dirty = True
+
+    def record_visit(self, state, action):
+        self.visits[self.entry(state, action)] += 1
+
+    def visit_count(self, state, action):
+        return int(self.visits[self.entry(state, action)])
+
+    def __contains__(self, key):
+        return bool(self.seen[self.entry(*key)])
+
+    def __len__(self):
+        return int(self.seen.sum())
+
+    def action_values(self, state, moves):
+        return self.values[state, [ACTION_INDEX[move] for move in moves]]
+
+    def values_for(self, state, actions):
+        return self.values[state, actions]
+
+    def visits_for(self, state, actions):
+        return self.visits[state, actions]
+
+    def visits_matrix(self, states):
+        return self.visits[states]
+
+    def max_value(self, state, actions):
+        return float(self.values_for(state, actions).max()) if len(actions) else 0.0
+
+    def items(self):
+        for state, a in zip(*np.nonzero(self.seen)):
+            yield (int(state), ACTIONS[a]), float(self.values[state, a])
+
+    def load_legacy(self, *legacy_tables):
+        for legacy_table in legacy_tables:
+            for (legacy_state, action), q_value in legacy_table.items():
+                self[(from_legacy_key(legacy_state), action)] = q_value
+
+    def to_legacy(self):
+        return {(to_legacy_key(state), action): q_value for (state, action), q_value in self.items()}
+
+    def nbytes(self):
+        return self.values.nbytes + self.seen.nbytes + self.visits.nbytes
+
+    @classmethod
+    def open(cls, path, mode='c', flags=None):
+        # Maps a .qtb file instead of reading it. With the default copy-on-write mode, processes
+        # share the file's pages until they write to an entry. A file of another layout, or one cut
+        # short, raises ValueError: starting an empty table would overwrite it at the next checkpoint.
+        expected = (QTB_MAGIC, QTB_VERSION, cls.flags if flags is None else flags, NUM_STATES, NUM_ACTIONS)
+        for field, found, wanted in zip(QTB_FIELDS, read_header(path), expected):
+            if found != wanted:
+                raise ValueError(f"{path}: {field} is {found!r}, expected {wanted!r}")
+        size = os.path.getsize(path)
+        if size != QTB_SIZE:
+            raise ValueError(f"{path}: file is {size} bytes, expected {QTB_SIZE} (truncated or damaged)")
+        shape = (NUM_STATES, NUM_ACTIONS)
+        offset = QTB_DATA_OFFSET
+        arrays = []
+        for dtype in (np.float32, bool, np.uint32):
+            arrays.append(np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape))
+            offset += arrays[-1].nbytes
+        return cls(*arrays)
+
+    def detach(self):
+        # Copy mapped arrays into memory, so the file they came from can be replaced.
+        if isinstance(self.values, np.memmap):
+            self.values = np.array(self.values)
+            self.seen = np.array(self.seen)
+            self.visits = np.array(self.visits)
+
+    def save(self, path):
+        self.detach()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(QTB_HEADER.pack(QTB_MAGIC, QTB_VERSION, self.flags, NUM_STATES, NUM_ACTIONS).ljust(QTB_DATA_OFFSET, b"\0"))
+            self.values.tofile(f)
+            self.seen.tofile(f)
+            self.visits.tofile(f)
+        os.replace(temp_path, path)
+        self.dirty = False
+
+
+class CanonicalQTable(DenseQTable):
+    # Keys are still raw (state, move) pairs; each is folded onto its symmetry/colour-swap
+    # representative, so every equivalent (position, move) reads and writes the same entry.
+    flags = QTB_CANONICAL | QTB_MERGED_ACTIONS
+
+    @classmethod
+    def open(cls, path, mode='c'):
+        if read_header(path)[2] != QTB_CANONICAL:
+            return super().open(path, mode)
+        # Written before equivalent moves were merged: fold their entries together in memory.
+        table = super().open(path, mode, QTB_CANONICAL)
+        table.merge_actions()
+        return table
+
+    def merge_actions(self):
+        # Each representative entry gets the mean of the written values folded onto it and their total visits.
+        states, actions = np.nonzero(self.seen)
+        rows, cols = CANONICAL_STATES[states], CANONICAL_ACTIONS[states, actions]
+        totals = np.zeros(self.values.shape)
+        counts = np.zeros(self.values.shape, dtype=np.int64)
+        visits = np.zeros(self.visits.shape, dtype=np.int64)
+        np.add.at(totals, (rows, cols), self.values[states, actions])
+        np.add.at(counts, (rows, cols), 1)
+        np.add.at(visits, (rows, cols), self.visits[states, actions])
+        merged = counts > 0
+        self.detach()
+        self.values[:] = np.where(merged, totals / np.maximum(counts, 1), 0.0)
+        self.seen[:] = merged
+        self.visits[:] = visits
+        self.dirty = True
+
+    def entry(self, state, action):
+        return CANONICAL_STATE[state], CANONICAL_ACTION[state][ACTION_INDEX[action]]
+
+    def action_values(self, state, moves):
+        actions = CANONICAL_ACTION[state]
+        return self.values[CANONICAL_STATE[state], [actions[ACTION_INDEX[move]] for move in moves]]
+
+    def values_for(self, state, actions):
+        return self.values[CANONICAL_STATE[state], CANONICAL_ACTIONS[state][actions]]
+
+    def entries(self, states, actions):
+        return CANONICAL_STATES[states], CANONICAL_ACTIONS[states, actions]
+
+    def values_matrix(self, states):
+        return self.values[self.entries(states[:, None], ALL_ACTIONS[None, :])]
+
+    def visits_for(self, state, actions):
+        return self.visits[CANONICAL_STATE[state], CANONICAL_ACTIONS[state][actions]]
+
+    def visits_matrix(self, states):
+        return self.visits[self.entries(states[:, None], ALL_ACTIONS[None, :])]
+
+    def load_legacy(self, *legacy_tables):
+        # Symmetric copies (including the other colour's table) collapse onto one entry; keep their mean.
+        totals = np.zeros_like(self.values, dtype=np.float64)
+        counts = np.zeros_like(self.values, dtype=np.int64)
+        for legacy_table in legacy_tables:
+            for (legacy_state, action), q_value in legacy_table.items():
+                entry = self.entry(from_legacy_key(legacy_state), action)
+                totals[entry] += q_value
+                counts[entry] += 1
+        loaded = counts > 0
+        self.values[loaded] = totals[loaded] / counts[loaded]
+        self.seen |= loaded
+
+
+def legacy_file(q_table_file):
+    return os.path.splitext(q_table_file)[0] + ".pkl"
+
+
+def load_table_file(q_table_file, table_class=DenseQTable):
+    # Maps the .qtb file; only when there is none yet is the shipped pickle next to it read. File
+    # times are not compared: a checkout touches the pickles and would hide the trained .qtb.
+    # Returns None if neither exists; an unreadable .qtb raises ValueError from open().
+    if os.path.exists(q_table_file):
+        return table_class.open(q_table_file)
+    pickle_file = legacy_file(q_table_file)
+    if not os.path.exists(pickle_file):
+        return None
+    with open(pickle_file, 'rb') as f:
+        legacy_table = pickle.load(f)
+    table = table_class()
+    table.load_legacy(legacy_table)
+    table.dirty = False
+    return table
+
+
+def _legacy_state(board, player):
+    return (tuple((k, board[k]) for k in sorted(board.keys())), player)
+
+
+def compare_backends(q_table_file, updates=100000, seed=0):
+    tracemalloc.start()
+    with open(q_table_file, 'rb') as f:
+        legacy_table = pickle.load(f)
+    dict_table = defaultdict(lambda: 0.0, legacy_table)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    dense_table = DenseQTable()
+    dense_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    dense_table.load_legacy(legacy_table)
+
+    # Replay the same (state, action) sequence through the update path the AI uses with each backend:
+    # building the nested tuple key for the dict, ranking the board and going through
+    # DenseQTable.__getitem__/__setitem__ (with its seen/dirty bookkeeping) for the dense table.
+    rng = np.random.default_rng(seed)
+    samples = []
+    for state in rng.integers(0, NUM_STATES, size=updates):
+        board, player = index_to_state(int(state))
+        moves = board.available_moves(player) or [ACTIONS[0]]
+        samples.append((board.to_dict(), player, moves[rng.integers(len(moves))]))
+
+    start = time.perf_counter()
+    for board, player, action in samples:
+        key = (_legacy_state(board, player), action)
+        dict_table[key] = dict_table[key] + 0.1 * (1.0 - dict_table[key])
+    dict_latency = (time.perf_counter() - start) / updates
+
+    boards = [(Bitboard.from_dict(board), player, action) for board, player, action in samples]
+    start = time.perf_counter()
+    for board, player, action in boards:
+        key = (state_index(board, player), action)
+        old_q = dense_table[key]
+        dense_table[key] = old_q + 0.1 * (1.0 - old_q)
+    dense_latency = (time.perf_counter() - start) / updates
+
+    print(f"{q_table_file}: {len(legacy_table)} entries")
+    print(f"  dict  backend: {dict_bytes / 1024:8.1f} KiB, {dict_latency * 1e9:7.0f} ns/update")
+    print(f"  dense backend: {dense_bytes / 1024:8.1f} KiB, {dense_latency * 1e9:7.0f} ns/update")
+
+
+if __name__ == "__main__":
+    for q_table_file in sys.argv[1:] or ["q_table_b.pkl", "q_table_w.pkl", "q_table_shark_b.pkl", "q_table_shark_w.pkl"]:
+        compare_backends(q_table_file)
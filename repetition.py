@@ -0,0 +1,40 @@
+from bitboard import state_index
+
+
+class DrawRule:
+    # Ends a game as a draw once a position (board plus side to move, i.e. its state index) has
+    # occurred `repetitions` times, or after `max_plies` moves. 0 disables either limit.
+    def __init__(self, repetitions=3, max_plies=200, reward=0.0):
+        self.repetitions = repetitions
+        self.max_plies = max_plies
+        self.reward = reward
+        self.counts = {}
+        self.plies = 0
+
+    def new_game(self, state):
+        self.counts = {state: 1}
+        self.plies = 0
+
+    def record(self, state):
+        # Call after every move with the position the next player faces; True means the game is drawn.
+        self.plies += 1
+        count = self.counts.get(state, 0) + 1
+        self.counts[state] = count
+        return bool(self.repetitions and count >= self.repetitions) or bool(self.max_plies and self.plies >= self.max_plies)
+
+
+def play_and_train(game, ai, move):
+    # One training move of an auto-play loop (the simulators and mini.py): plays the AI's move on the
+    # game and trains it on the result, 1.0 for completing a line and -0.1 when the mover has no moves
+    # left on the new board. Only a move that does neither can end the game in a draw, by game.draw_rule.
+    # Returns (reward, draw).
+    from_pos, to_pos = move
+    old_state = state_index(game.board, game.current_player)
+    game.apply_move(from_pos, to_pos)
+    new_state = state_index(game.board, game.current_player)
+    reward = 1.0 if game.check_winner() and game.current_player == ai.player else -0.1 if not game.get_available_moves() else 0.0
+    draw = game.draw_rule.record(new_state ^ 1) and reward == 0.0
+    if draw:
+        reward = game.draw_rule.reward
+    ai.train(old_state, move, reward, new_state, draw)
+    return reward, draw
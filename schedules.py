@@ -0,0 +1,97 @@
+import numpy as np
+
+# Schedules map (training step, visit count) to a rate. Steps are the AI's Q-updates so far, which
+# persist with the table as the sum of its visit counts. For epsilon the count is N(s), the visits
+# of the position about to be played; for the learning rate it is N(s, a) including this update.
+# Each works on plain numbers (__call__) and on NumPy arrays (values) for the batch trainer.
+
+
+class ConstantSchedule:
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, step, visits):
+        return self.value
+
+    def values(self, step, visits):
+        return np.full(np.shape(visits), self.value)
+
+
+class LinearSchedule:
+    # start -> end over `steps` updates, then stays at end.
+    def __init__(self, start, end, steps):
+        self.start = start
+        self.end = end
+        self.steps = steps
+
+    def __call__(self, step, visits):
+        return self.end if step >= self.steps else self.start + (self.end - self.start) * step / self.steps
+
+    def values(self, step, visits):
+        return np.full(np.shape(visits), self(step, visits))
+
+
+class ExponentialSchedule:
+    # start * decay^step, never below end.
+    def __init__(self, start, end, decay):
+        self.start = start
+        self.end = end
+        self.decay = decay
+
+    def __call__(self, step, visits):
+        return max(self.end, self.start * self.decay ** step)
+
+    def values(self, step, visits):
+        return np.full(np.shape(visits), self(step, visits))
+
+
+class VisitSchedule:
+    # start * scale / (scale + N), never below end: frequently seen positions explore less.
+    def __init__(self, start, end, scale):
+        self.start = start
+        self.end = end
+        self.scale = scale
+
+    def __call__(self, step, visits):
+        return max(self.end, self.start * self.scale / (self.scale + visits))
+
+    def values(self, step, visits):
+        return np.maximum(self.end, self.start * self.scale / (self.scale + np.asarray(visits, dtype=np.float64)))
+
+
+class InverseVisitSchedule:
+    # 1 / N^power, never below minimum; power 1 gives the sample mean of the targets.
+    def __init__(self, power=1.0, minimum=0.0):
+        self.power = power
+        self.minimum = minimum
+
+    def __call__(self, step, visits):
+        return max(self.minimum, 1.0 / max(visits, 1) ** self.power)
+
+    def values(self, step, visits):
+        return np.maximum(self.minimum, 1.0 / np.maximum(np.asarray(visits, dtype=np.float64), 1.0) ** self.power)
+
+
+SCHEDULES = {
+    "constant": (ConstantSchedule, 1),
+    "linear": (LinearSchedule, 3),
+    "exponential": (ExponentialSchedule, 3),
+    "visits": (VisitSchedule, 3),
+    "inverse": (InverseVisitSchedule, 2),
+}
+
+
+def parse_schedule(text):
+    # "constant:0.1", "linear:START:END:STEPS", "exponential:START:END:DECAY",
+    # "visits:START:END:SCALE" or "inverse:POWER:MIN"; a bare number means constant.
+    name, *params = text.split(':')
+    if name not in SCHEDULES:
+        name, params = "constant", [text]
+    schedule_class, count = SCHEDULES[name]
+    try:
+        numbers = [float(p) for p in params]
+    except ValueError:
+        raise ValueError(f"Invalid schedule {text!r}") from None
+    if len(numbers) != count:
+        raise ValueError(f"Schedule {name!r} takes {count} value(s), got {text!r}")
+    return schedule_class(*numbers)
@@ -1,29 +1,213 @@
-import tkinter as tk
-from tkinter import messagebox
-import copy
+import argparse
+import json
+import os
+import sys
+import time
 from ai_player import BlackVsWhiteAI, SharkAI
+from bitboard import Bitboard, CONNECTIONS, WINNING_COMBOS, index_to_state, state_index
+from checkpoint import CheckpointManager
+from convergence import ConvergenceTracker
+from planning import PrioritizedSweeping
+from profiling import Instrumentation, parse_window
+from repetition import DrawRule, play_and_train
+from schedules import parse_schedule
+from start_positions import Curriculum, StartDistribution, describe_state, parse_distribution, setup_state
 
-class BlackVsWhiteSimulator:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Black vs. White Simulator")
-        self.ai_black_default = BlackVsWhiteAI(self, 'B')
-        self.ai_black_shark = SharkAI(self, 'B')
-        self.ai_white_default = BlackVsWhiteAI(self, 'W')
-        self.ai_white_shark = SharkAI(self, 'W')
-        self.board = {'1': None, '2': None, '3': None, '4': None, '5': None, '6': None, '7': None, '8': None, 'C': None}
+class SimulatorEngine:
+    def __init__(self, canonical=False, checkpoint_interval=30.0, checkpoint_games=None, threat_depth=1, draw_rule=None):
+        self.ai_black_default = BlackVsWhiteAI(self, 'B', canonical)
+        self.ai_black_shark = SharkAI(self, 'B', canonical, threat_depth)
+        self.ai_white_default = BlackVsWhiteAI(self, 'W', canonical)
+        self.ai_white_shark = SharkAI(self, 'W', canonical, threat_depth)
+        self.checkpoints = CheckpointManager([self.ai_black_default, self.ai_black_shark, self.ai_white_default, self.ai_white_shark],
+                                             checkpoint_interval, checkpoint_games)
+        self.board = Bitboard()
         self.initial_board = None
         self.initial_first_player = 'B'
         self.current_player = 'B'
         self.black_wins = 0
         self.white_wins = 0
+        self.draws = 0
+        self.draw_rule = draw_rule or DrawRule()
+        self.tracker = None
+        self.planners = []  # PrioritizedSweeping planners run between games
+        # Optional StartDistribution: each game then starts from a sampled position instead of initial_board.
+        self.start_distribution = None
+        self.start_state = None
+        self.start_stats = {}  # start state -> [games, Black wins, White wins, draws]
         self.auto_play_active = False
-        self.connections = {
-            '1': ['C', '2', '8'], '2': ['C', '1', '3'], '3': ['C', '2', '4'], '4': ['C', '3', '5'],
-            '5': ['C', '4', '6'], '6': ['C', '5', '7'], '7': ['C', '6', '8'], '8': ['C', '7', '1'],
-            'C': ['1', '2', '3', '4', '5', '6', '7', '8']
-        }
-        self.winning_combos = [('1', 'C', '5'), ('2', 'C', '6'), ('3', 'C', '7'), ('8', 'C', '4')]
+        self.connections = CONNECTIONS
+        self.winning_combos = WINNING_COMBOS
+
+    def get_available_moves(self):
+        return self.board.available_moves(self.current_player)
+
+    def check_winner(self):
+        return self.board.has_won(self.current_player)
+
+    def apply_move(self, from_pos, to_pos):
+        self.board.move(from_pos, to_pos, self.current_player)
+
+    def set_schedules(self, epsilon_schedule, learning_rate_schedule):
+        for ai in (self.ai_black_default, self.ai_black_shark, self.ai_white_default, self.ai_white_shark):
+            ai.epsilon_schedule = epsilon_schedule
+            ai.learning_rate_schedule = learning_rate_schedule
+
+    def track_convergence(self, tracker, black_choice, white_choice):
+        self.tracker = tracker
+        for player, choice in (('B', black_choice), ('W', white_choice)):
+            self.get_ai(player, choice).tracker = tracker
+
+    def enable_planning(self, black_choice, white_choice, budget, threshold=1e-4):
+        # Dyna planning for the AIs being trained: up to `budget` model backups each after every game.
+        self.planners = []
+        for player, choice in (('B', black_choice), ('W', white_choice)):
+            ai = self.get_ai(player, choice)
+            ai.planner = PrioritizedSweeping(ai, budget, threshold)
+            self.planners.append(ai.planner)
+
+    def plan(self):
+        return sum(planner.plan() for planner in self.planners)
+
+    def get_ai(self, player, choice):
+        if player == 'B':
+            return self.ai_black_default if choice == "Default" else self.ai_black_shark if choice == "Shark" else None
+        else:
+            return self.ai_white_default if choice == "Default" else self.ai_white_shark if choice == "Shark" else None
+
+    def set_initial_board(self, black, white, first_player):
+        self.board = Bitboard()
+        for pos in black:
+            self.board[pos] = 'B'
+        for pos in white:
+            self.board[pos] = 'W'
+        self.initial_board = self.board.copy()
+        self.initial_first_player = first_player
+        self.current_player = first_player
+        self.black_wins = 0
+        self.white_wins = 0
+        self.draws = 0
+
+    def set_start_distribution(self, distribution):
+        self.start_distribution = distribution
+        self.start_stats = {}
+
+    def record_start(self, winner):
+        stats = self.start_stats.setdefault(self.start_state, [0, 0, 0, 0])
+        stats[0] += 1
+        if winner in ('B', 'W', 'D'):
+            stats[" BWD".index(winner)] += 1
+
+    def merge_start_stats(self, start_stats):
+        for state, counts in start_stats.items():
+            stats = self.start_stats.setdefault(state, [0, 0, 0, 0])
+            for i, count in enumerate(counts):
+                stats[i] += count
+
+    def report_starts(self, limit=10):
+        games = sum(stats[0] for stats in self.start_stats.values())
+        print(f"Starting positions ({self.start_distribution.name}): {len(self.start_stats)} of {len(self.start_distribution.states)} played")
+        for state, (played, black_wins, white_wins, draws) in sorted(self.start_stats.items(), key=lambda item: -item[1][0])[:limit]:
+            print(f"  {describe_state(state):32s} {played:8d} games ({100 * played / games:5.1f}%) | Black: {black_wins} | White: {white_wins} | Draws: {draws}")
+
+    def write_start_stats(self, path):
+        rows = [{"state": state, "setup": describe_state(state), "games": played, "black_wins": black_wins,
+                 "white_wins": white_wins, "draws": draws, "no_winner": played - black_wins - white_wins - draws}
+                for state, (played, black_wins, white_wins, draws) in sorted(self.start_stats.items())]
+        with open(path, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"Per-start statistics written to {path}")
+
+    def reset_to_initial(self):
+        if self.start_distribution:
+            self.start_state = self.start_distribution.sample()
+            self.board, self.current_player = index_to_state(self.start_state)
+            self.draw_rule.new_game(self.start_state)
+        elif self.initial_board:
+            self.board = self.initial_board.copy()
+            self.current_player = self.initial_first_player
+            self.draw_rule.new_game(state_index(self.board, self.current_player))
+
+    def record_win(self):
+        if self.current_player == 'B':
+            self.black_wins += 1
+        else:
+            self.white_wins += 1
+
+class HeadlessSimulator(SimulatorEngine):
+    def play_one_game(self, black_choice, white_choice, verbose=False):
+        # Same move/train loop as the GUI simulator, without any event-loop round trips.
+        # Returns 'B' or 'W' for a win, 'D' for a draw, None when the game stops without a winner.
+        self.reset_to_initial()
+        while True:
+            if self.check_winner():
+                self.record_win()
+                return self.current_player
+            if not self.get_available_moves():
+                return None
+            ai = self.get_ai(self.current_player, black_choice if self.current_player == 'B' else white_choice)
+            if not ai:
+                return None
+            move = ai.get_best_move()
+            if not move:
+                return None
+            from_pos, to_pos = move
+            reward, draw = play_and_train(self, ai, move)
+            if verbose:
+                print(f"{self.current_player} moved {from_pos} to {to_pos}, Reward: {reward}")
+            if self.check_winner():
+                self.record_win()
+                return self.current_player
+            if draw:
+                self.draws += 1
+                return 'D'
+            self.current_player = 'W' if self.current_player == 'B' else 'B'
+
+    def run(self, num_games, black_choice, white_choice, verbose=False):
+        games_played = 0
+        start = time.perf_counter()
+        try:
+            for games_played in range(1, num_games + 1):
+                winner = self.play_one_game(black_choice, white_choice, verbose)
+                if self.start_distribution:
+                    self.record_start(winner)
+                self.plan()
+                self.checkpoints.game_finished()
+                if verbose:
+                    result = "Draw" if winner == 'D' else f"{'Black' if winner == 'B' else 'White'} wins" if winner else "No moves available"
+                    print(f"Game {games_played} ended: {result}")
+                if self.tracker and self.tracker.game_finished():
+                    print(f"Policy unchanged for {self.tracker.stable_games} games, stopping early")
+                    break
+        except KeyboardInterrupt:
+            games_played -= 1
+            print("Simulation aborted")
+        elapsed = time.perf_counter() - start
+        self.checkpoints.flush()
+        rate = games_played / elapsed if elapsed > 0 else 0.0
+        print(f"Completed {games_played} games in {elapsed:.2f}s ({rate:.1f} games/sec)")
+        print(f"Black: {self.black_wins} | White: {self.white_wins} | Draws: {self.draws}")
+        if self.planners:
+            print(f"Planning: {sum(planner.backups for planner in self.planners)} backups")
+        if self.start_distribution:
+            self.report_starts()
+        return games_played
+
+# Tkinter is only imported for the GUI, so headless runs never need it.
+tk = messagebox = None
+
+def load_tkinter():
+    global tk, messagebox
+    if tk is None:
+        import tkinter as tk
+        from tkinter import messagebox
+
+class BlackVsWhiteSimulator(SimulatorEngine):
+    def __init__(self, root):
+        load_tkinter()
+        super().__init__()
+        self.root = root
+        self.root.title("Black vs. White Simulator")
         self.setup_gui()
 
     def setup_gui(self):
@@ -57,28 +241,9 @@ class BlackVsWhiteSimulator:
         self.run_button = tk.Button(self.main_frame, text="Run Simulation", command=self.run_simulation)
         self.run_button.pack(pady=10)
 
-    def get_available_moves(self):
-        moves = []
-        for pos, piece in self.board.items():
-            if piece == self.current_player:
-                for next_pos in self.connections[pos]:
-                    if self.board[next_pos] is None:
-                        moves.append((pos, next_pos))
-        return moves
-
-    def check_winner(self):
-        return any(all(self.board[pos] == self.current_player for pos in combo) for combo in self.winning_combos)
-
     def get_current_ai(self):
-        if self.current_player == 'B':
-            return self.ai_black_default if self.black_ai_var.get() == "Default" else self.ai_black_shark if self.black_ai_var.get() == "Shark" else None
-        else:
-            return self.ai_white_default if self.white_ai_var.get() == "Default" else self.ai_white_shark if self.white_ai_var.get() == "Shark" else None
-
-    def reset_to_initial(self):
-        if self.initial_board:
-            self.board = copy.deepcopy(self.initial_board)
-            self.current_player = self.initial_first_player
+        choice = self.black_ai_var.get() if self.current_player == 'B' else self.white_ai_var.get()
+        return self.get_ai(self.current_player, choice)
 
     def run_simulation(self):
         black_positions = self.black_positions_entry.get()
@@ -107,16 +272,7 @@ class BlackVsWhiteSimulator:
             messagebox.showerror("Error", "Both Black and White must have an AI selected for simulation.")
             return
 
-        self.board = {'1': None, '2': None, '3': None, '4': None, '5': None, '6': None, '7': None, '8': None, 'C': None}
-        for pos in black:
-            self.board[pos] = 'B'
-        for pos in white:
-            self.board[pos] = 'W'
-        self.initial_board = copy.deepcopy(self.board)
-        self.initial_first_player = first_player
-        self.current_player = first_player
-        self.black_wins = 0
-        self.white_wins = 0
+        self.set_initial_board(black, white, first_player)
         self.auto_play_active = True
 
         self.main_frame.destroy()
@@ -124,7 +280,7 @@ class BlackVsWhiteSimulator:
         self.results_window.title("Simulation Results")
         self.results_frame = tk.Frame(self.results_window)
         self.results_frame.pack(padx=10, pady=10)
-        self.scoreboard_label = tk.Label(self.results_frame, text="Black: 0 | White: 0", font=("Arial", 12, "bold"))
+        self.scoreboard_label = tk.Label(self.results_frame, text="Black: 0 | White: 0 | Draws: 0", font=("Arial", 12, "bold"))
         self.scoreboard_label.pack()
         self.abort_button = tk.Button(self.results_frame, text="Abort Simulation", command=self.abort_simulation)
         self.abort_button.pack(pady=10)
@@ -132,28 +288,22 @@ class BlackVsWhiteSimulator:
         self.run_simulation_loop(num_simulations, 0)
 
     def update_scoreboard(self):
-        self.scoreboard_label.config(text=f"Black: {self.black_wins} | White: {self.white_wins}")
+        self.scoreboard_label.config(text=f"Black: {self.black_wins} | White: {self.white_wins} | Draws: {self.draws}")
 
     def abort_simulation(self):
         self.auto_play_active = False
-        self.ai_black_default.save_q_table()
-        self.ai_black_shark.save_q_table()
-        self.ai_white_default.save_q_table()
-        self.ai_white_shark.save_q_table()
+        self.checkpoints.flush()
         self.results_window.destroy()
         self.setup_gui()
-        messagebox.showinfo("Simulation Aborted", f"Completed {self.black_wins + self.white_wins} games!\nBlack: {self.black_wins} | White: {self.white_wins}")
+        messagebox.showinfo("Simulation Aborted", f"Completed {self.black_wins + self.white_wins + self.draws} games!\nBlack: {self.black_wins} | White: {self.white_wins} | Draws: {self.draws}")
 
     def run_simulation_loop(self, total_games, games_played):
         if not self.auto_play_active or games_played >= total_games:
             self.auto_play_active = False
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.flush()
             self.results_window.destroy()
             self.setup_gui()
-            messagebox.showinfo("Simulation Complete", f"Completed {games_played} games!\nBlack: {self.black_wins} | White: {self.white_wins}")
+            messagebox.showinfo("Simulation Complete", f"Completed {games_played} games!\nBlack: {self.black_wins} | White: {self.white_wins} | Draws: {self.draws}")
             return
         self.reset_to_initial()
         print(f"Starting game {games_played + 1}/{total_games}")
@@ -167,18 +317,12 @@ class BlackVsWhiteSimulator:
         if self.check_winner() or not self.get_available_moves():
             if self.check_winner():
                 winner = 'Black' if self.current_player == 'B' else 'White'
-                if self.current_player == 'B':
-                    self.black_wins += 1
-                else:
-                    self.white_wins += 1
+                self.record_win()
                 self.update_scoreboard()
                 print(f"Game {games_played + 1} ended: {winner} wins")
             else:
                 print(f"Game {games_played + 1} ended: No moves available")
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.game_finished()
             self.root.after(50, lambda: self.run_simulation_loop(total_games, games_played + 1))
             return
         ai = self.get_current_ai()
@@ -189,37 +333,139 @@ class BlackVsWhiteSimulator:
         move = ai.get_best_move()
         if not move:
             print(f"No valid moves for {self.current_player} in game {games_played + 1}")
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.game_finished()
             self.root.after(50, lambda: self.run_simulation_loop(total_games, games_played + 1))
             return
         from_pos, to_pos = move
-        old_board = copy.deepcopy(self.board)
-        self.board[from_pos] = None
-        self.board[to_pos] = self.current_player
-        reward = 1.0 if self.check_winner() and self.current_player == ai.player else -0.1 if not self.get_available_moves() else 0.0
-        ai.train(old_board, move, reward, self.board)
+        reward, draw = play_and_train(self, ai, move)
         print(f"Game {games_played + 1}: {self.current_player} moved {from_pos} to {to_pos}, Reward: {reward}")
         if self.check_winner():
             winner = 'Black' if self.current_player == 'B' else 'White'
-            if self.current_player == 'B':
-                self.black_wins += 1
-            else:
-                self.white_wins += 1
+            self.record_win()
             self.update_scoreboard()
             print(f"Game {games_played + 1} ended: {winner} wins")
-            self.ai_black_default.save_q_table()
-            self.ai_black_shark.save_q_table()
-            self.ai_white_default.save_q_table()
-            self.ai_white_shark.save_q_table()
+            self.checkpoints.game_finished()
+            self.root.after(50, lambda: self.run_simulation_loop(total_games, games_played + 1))
+            return
+        if draw:
+            self.draws += 1
+            self.update_scoreboard()
+            print(f"Game {games_played + 1} ended: Draw")
+            self.checkpoints.game_finished()
             self.root.after(50, lambda: self.run_simulation_loop(total_games, games_played + 1))
             return
         self.current_player = 'W' if self.current_player == 'B' else 'B'
         self.root.after(50, lambda: self.play_one_game(total_games, games_played))
 
+def add_simulation_arguments(parser):
+    parser.add_argument("--black", type=str.capitalize, choices=["Default", "Shark"], required=True, help="Black AI (default or shark)")
+    parser.add_argument("--white", type=str.capitalize, choices=["Default", "Shark"], required=True, help="White AI (default or shark)")
+    parser.add_argument("--start", default="C 3 5", help="Black starting positions (e.g., \"C 3 5\")")
+    parser.add_argument("--white-start", default="2 4 7", help="White starting positions (e.g., \"2 4 7\")")
+    parser.add_argument("--first", type=str.upper, choices=["B", "W"], default="B", help="Who moves first")
+    parser.add_argument("--starts", help="Sample each game's start instead: uniform, known[:WEIGHT] (in-game setups with probability WEIGHT) or a setup list file")
+    parser.add_argument("--games", type=int, default=1000, help="Number of games to simulate")
+    parser.add_argument("--canonical", action="store_true", help="Train symmetry-canonical tables shared by both colours")
+    parser.add_argument("--threat-depth", type=int, default=1, help="Plies within which Shark penalises an opponent's forced win")
+    parser.add_argument("--repetitions", type=int, default=3, help="Declare a draw when a position occurs this often (0 to disable)")
+    parser.add_argument("--max-plies", type=int, default=200, help="Declare a draw after this many moves (0 to disable)")
+    parser.add_argument("--draw-reward", type=float, default=0.0, help="Reward for the move that ends a game in a draw")
+    parser.add_argument("--epsilon", help="Exploration schedule: 0.1, linear:START:END:STEPS, exponential:START:END:DECAY or visits:START:END:SCALE")
+    parser.add_argument("--learning-rate", help="Learning-rate schedule: 0.1, or inverse:POWER:MIN for 1/N(s,a)^POWER")
+    parser.add_argument("--checkpoint-interval", type=float, default=30.0, help="Seconds between Q-table checkpoints")
+    parser.add_argument("--checkpoint-games", type=int, default=0, help="Also checkpoint every N games (0 to disable)")
+
+
+def parse_positions(parser, args):
+    black = args.start.split()
+    white = args.white_start.split()
+    if (len(black) != 3 or len(white) != 3 or
+        not all(p in CONNECTIONS for p in black + white) or
+        len(set(black + white)) != 6 or args.games <= 0):
+        parser.error("Invalid input. Use 3 unique positions from 1-8 or C per side, no overlaps, and a positive number of games.")
+    if args.threat_depth < 1:
+        parser.error("--threat-depth must be at least 1.")
+    if args.repetitions < 0 or args.max_plies < 0:
+        parser.error("--repetitions and --max-plies cannot be negative.")
+    return black, white
+
+
+def parse_schedules(parser, args):
+    # None keeps the AI's fixed epsilon / learning_rate.
+    try:
+        return (parse_schedule(args.epsilon) if args.epsilon else None,
+                parse_schedule(args.learning_rate) if args.learning_rate else None)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def parse_start_distribution(parser, args):
+    try:
+        return parse_distribution(args.starts) if args.starts else None
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def parse_draw_rule(args):
+    return DrawRule(args.repetitions, args.max_plies, args.draw_reward)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Black vs. White self-play trainer.")
+    add_simulation_arguments(parser)
+    parser.add_argument("--verbose", action="store_true", help="Log every move and result")
+    parser.add_argument("--track-convergence", action="store_true", help="Print |dQ|, states touched and policy changes per window of games")
+    parser.add_argument("--convergence-window", type=int, default=1000, help="Games per convergence statistics window")
+    parser.add_argument("--stable-games", type=int, default=0, help="Stop once the greedy policy has not changed for this many games (implies --track-convergence)")
+    parser.add_argument("--instrument", action="store_true", help="Time each phase and print a summary at the end")
+    parser.add_argument("--profile-games", metavar="FIRST:LAST", help="Write cProfile stats for these games (implies --instrument)")
+    parser.add_argument("--profile-out", default="simulator.prof", help="File for the cProfile stats")
+    parser.add_argument("--start-stats", help="With --starts, write per-start-position results to this JSON file")
+    parser.add_argument("--curriculum", type=int, metavar="STAGE_GAMES", help="Start from positions near the end of the game and move back to the openings, STAGE_GAMES games per stage")
+    parser.add_argument("--planning", type=int, default=0, metavar="BACKUPS", help="Prioritised-sweeping backups per AI between games (0 to disable)")
+    parser.add_argument("--planning-threshold", type=float, default=1e-4, help="Smallest Q-value change worth propagating to predecessor positions")
+    args = parser.parse_args(argv)
+
+    black, white = parse_positions(parser, args)
+    try:
+        profile_window = parse_window(args.profile_games) if args.profile_games else None
+    except ValueError as e:
+        parser.error(str(e))
+    simulator = HeadlessSimulator(args.canonical, args.checkpoint_interval, args.checkpoint_games, args.threat_depth, parse_draw_rule(args))
+    simulator.set_initial_board(black, white, args.first)
+    simulator.set_schedules(*parse_schedules(parser, args))
+    start_distribution = parse_start_distribution(parser, args)
+    if args.curriculum is not None:
+        if args.curriculum <= 0:
+            parser.error("--curriculum must be positive.")
+        start_distribution = Curriculum(start_distribution or StartDistribution([setup_state(black, white, args.first)], name="the start position"), args.curriculum)
+    simulator.set_start_distribution(start_distribution)
+    if args.planning < 0 or args.planning_threshold < 0:
+        parser.error("--planning and --planning-threshold cannot be negative.")
+    if args.planning:
+        simulator.enable_planning(args.black, args.white, args.planning, args.planning_threshold)
+    if args.convergence_window <= 0 or args.stable_games < 0:
+        parser.error("--convergence-window must be positive and --stable-games cannot be negative.")
+    if args.track_convergence or args.stable_games:
+        simulator.track_convergence(ConvergenceTracker(args.convergence_window, args.stable_games), args.black, args.white)
+    instrumentation = None
+    if args.instrument or profile_window:
+        instrumentation = Instrumentation(profile_window, args.profile_out).attach(simulator)
+    simulator.run(args.games, args.black, args.white, args.verbose)
+    if instrumentation:
+        instrumentation.report()
+    if args.start_stats and start_distribution:
+        simulator.write_start_stats(args.start_stats)
+    return 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    load_tkinter()
     root = tk.Tk()
     simulator = BlackVsWhiteSimulator(root)
+    # The GUI takes no arguments, so instrumentation is switched on from the environment.
+    if os.environ.get("SIMULATOR_INSTRUMENT") or os.environ.get("SIMULATOR_PROFILE"):
+        profile = os.environ.get("SIMULATOR_PROFILE")
+        Instrumentation(parse_window(profile) if profile else None).attach(simulator)
     root.mainloop()
\ No newline at end of file
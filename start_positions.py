@@ -0,0 +1,154 @@
+import random
+import numpy as np
+from bitboard import CELL_BITS, Bitboard, NUM_STATES, index_to_state, state_index
+from state_graph import get_graph
+from tablebase import DRAW, get_tablebase
+
+# Curriculum stages, in plies from the end of the game.
+DEFAULT_DISTANCES = (1, 3, 5, 7, 11)
+
+# Setups the in-game opponent is known to start from: (Black, White, first player).
+KNOWN_SETUPS = [("C 3 5", "2 4 7", 'B')]
+
+
+def legal_starts():
+    # Every 3-vs-3 placement where neither side has a line yet and the side to move can move, for both first movers.
+    graph = get_graph()
+    return [s for s in range(NUM_STATES) if not graph.terminal[s] and graph.moves[s]]
+
+
+_legal_starts = None
+
+
+def legal_starts_set():
+    global _legal_starts
+    if _legal_starts is None:
+        _legal_starts = set(legal_starts())
+    return _legal_starts
+
+
+def setup_state(black, white, first_player):
+    # State index of a setup given as position lists (or "C 3 5" strings); ValueError if it is not a legal start.
+    black = black.split() if isinstance(black, str) else list(black)
+    white = white.split() if isinstance(white, str) else list(white)
+    first_player = first_player.upper()
+    if (len(black) != 3 or len(white) != 3 or not all(p in CELL_BITS for p in black + white) or
+            len(set(black + white)) != 6 or first_player not in ('B', 'W')):
+        raise ValueError(f"Invalid setup: Black {' '.join(black)}, White {' '.join(white)}, first {first_player}")
+    board = Bitboard(sum(CELL_BITS[p] for p in black), sum(CELL_BITS[p] for p in white))
+    return state_index(board, first_player)
+
+
+def describe_state(state):
+    board, player = index_to_state(state)
+    black = ' '.join(p for p, piece in board.items() if piece == 'B')
+    white = ' '.join(p for p, piece in board.items() if piece == 'W')
+    return f"B {black} / W {white} / {player} first"
+
+
+class StartDistribution:
+    # Weighted choice of starting states; sample() uses the random module, so runs follow random.seed.
+    def __init__(self, states, weights=None, name="custom"):
+        if not states:
+            raise ValueError("A start distribution needs at least one starting position")
+        self.states = list(states)
+        self.weights = list(weights) if weights is not None else [1.0] * len(self.states)
+        self.name = name
+        self.cum_weights = []
+        total = 0.0
+        for weight in self.weights:
+            total += weight
+            self.cum_weights.append(total)
+        if total <= 0:
+            raise ValueError("A start distribution needs a positive total weight")
+
+    def sample(self):
+        return random.choices(self.states, cum_weights=self.cum_weights)[0]
+
+    def sample_many(self, rng, count):
+        # Vectorised sample() for the batch trainer, drawn from a NumPy Generator.
+        probabilities = np.asarray(self.weights) / self.cum_weights[-1]
+        return np.asarray(self.states, dtype=np.intp)[rng.choice(len(self.states), count, p=probabilities)]
+
+    @classmethod
+    def uniform(cls):
+        return cls(legal_starts(), name="uniform")
+
+    @classmethod
+    def known(cls, weight=0.5):
+        # Probability `weight` of one of the known in-game setups, the rest uniform over every legal start.
+        known = {setup_state(*setup) for setup in KNOWN_SETUPS}
+        states = legal_starts()
+        rest = len(states) - len(known)
+        weights = [weight / len(known) if s in known else (1.0 - weight) / rest for s in states]
+        return cls(states, weights, name=f"known:{weight}")
+
+    @classmethod
+    def from_file(cls, path):
+        # One setup per line: "C 3 5, 2 4 7, B" with an optional ", WEIGHT"; # starts a comment.
+        states, weights = [], []
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                fields = [field.strip() for field in line.split(',')]
+                try:
+                    if len(fields) not in (3, 4):
+                        raise ValueError("expected BLACK, WHITE, FIRST[, WEIGHT]")
+                    state = setup_state(*fields[:3])
+                    weight = float(fields[3]) if len(fields) == 4 else 1.0
+                    if state not in legal_starts_set() or weight < 0:
+                        raise ValueError("not a playable start, or a negative weight")
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: {e}") from None
+                states.append(state)
+                weights.append(weight)
+        return cls(states, weights, name=path)
+
+
+class Curriculum:
+    # Start distribution that begins next to the end of the game and works back to the real openings.
+    # Stage i starts games from decided positions at most distances[i] plies from the end (tablebase
+    # distance: 1 is a win on the spot, 3 a win with the mover's second move); a growing share of each
+    # stage's games, and every game after the last stage, come from `target`.
+    def __init__(self, target, stage_games, distances=DEFAULT_DISTANCES):
+        tablebase = get_tablebase()
+        starts = legal_starts()
+        self.target = target
+        self.stage_games = stage_games
+        self.stages = [StartDistribution([s for s in starts if tablebase.values[s] != DRAW and tablebase.distances[s] <= distance],
+                                         name=f"within {distance} plies of the end")
+                       for distance in distances]
+        self.states = sorted(set(target.states).union(*(stage.states for stage in self.stages)))
+        self.name = f"curriculum over {len(self.stages)} stages of {stage_games} games, then {target.name}"
+        self.games = 0
+
+    def stage(self):
+        return min(self.games // self.stage_games, len(self.stages))
+
+    def sample(self):
+        stage = self.stage()
+        self.games += 1
+        if stage == len(self.stages) or random.random() < stage / len(self.stages):
+            return self.target.sample()
+        return self.stages[stage].sample()
+
+
+def parse_distribution(text):
+    # "uniform", "known" or "known:WEIGHT", otherwise the path of a setup list file.
+    name, _, weight = text.partition(':')
+    if name == "uniform" and not weight:
+        return StartDistribution.uniform()
+    if name == "known":
+        try:
+            weight = float(weight) if weight else 0.5
+        except ValueError:
+            raise ValueError(f"Invalid start distribution {text!r}") from None
+        if not 0.0 <= weight <= 1.0:
+            raise ValueError("The known-setup weight must be between 0 and 1")
+        return StartDistribution.known(weight)
+    try:
+        return StartDistribution.from_file(text)
+    except OSError as e:
+        raise ValueError(f"Cannot read start list {text!r}: {e.strerror}") from None
@@ -0,0 +1,90 @@
+import os
+import numpy as np
+from bitboard import ACTIONS, ACTION_INDEX, NUM_STATES, HAS_LINE, index_to_state, state_index
+
+GRAPH_VERSION = 1
+GRAPH_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state_graph.npz")
+
+# winner[s] values
+NO_WINNER, BLACK_WINS, WHITE_WINS = 0, 1, 2
+
+
+def build_arrays():
+    # CSR layout: the legal moves of state s are actions[indptr[s]:indptr[s + 1]], and playing
+    # actions[i] leads to successors[i] (same board after the move, other side to move).
+    indptr = np.zeros(NUM_STATES + 1, dtype=np.int32)
+    actions = []
+    successors = []
+    winner = np.zeros(NUM_STATES, dtype=np.int8)
+    for s in range(NUM_STATES):
+        board, player = index_to_state(s)
+        opponent = 'W' if player == 'B' else 'B'
+        winner[s] = BLACK_WINS if HAS_LINE[board.black] else WHITE_WINS if HAS_LINE[board.white] else NO_WINNER
+        for from_pos, to_pos in board.available_moves(player):
+            after = board.copy()
+            after.move(from_pos, to_pos, player)
+            actions.append(ACTION_INDEX[(from_pos, to_pos)])
+            successors.append(state_index(after, opponent))
+        indptr[s + 1] = len(actions)
+    return indptr, np.array(actions, dtype=np.int8), np.array(successors, dtype=np.int16), winner
+
+
+class StateGraph:
+    def __init__(self, indptr, actions, successors, winner):
+        self.indptr = indptr
+        self.actions = actions
+        self.successors = successors
+        self.winner = winner
+        # Per-state views for the Python-level hot paths, so each query is a single list index.
+        self.action_arrays = [actions[indptr[s]:indptr[s + 1]] for s in range(NUM_STATES)]
+        self.successor_lists = [successors[indptr[s]:indptr[s + 1]].tolist() for s in range(NUM_STATES)]
+        self.moves = [[ACTIONS[a] for a in self.action_arrays[s]] for s in range(NUM_STATES)]
+        self.terminal = (winner != NO_WINNER).tolist()
+
+    @classmethod
+    def build(cls):
+        return cls(*build_arrays())
+
+    @classmethod
+    def load(cls, path=GRAPH_FILE):
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if int(data["version"]) == GRAPH_VERSION and len(data["indptr"]) == NUM_STATES + 1:
+                    return cls(data["indptr"], data["actions"], data["successors"], data["winner"])
+        graph = cls.build()
+        graph.save(path)
+        return graph
+
+    def save(self, path=GRAPH_FILE):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                np.savez(f, version=GRAPH_VERSION, indptr=self.indptr, actions=self.actions,
+                         successors=self.successors, winner=self.winner)
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # read-only install: the graph is simply rebuilt in memory next time
+
+    def successor(self, state, action):
+        start, end = self.indptr[state], self.indptr[state + 1]
+        for i in range(start, end):
+            if self.actions[i] == action:
+                return int(self.successors[i])
+        raise ValueError(f"Action {ACTIONS[action]} is not legal in state {state}")
+
+    def as_dense(self):
+        # (states x actions) successor table with -1 for illegal moves, for vectorised callers.
+        dense = np.full((NUM_STATES, len(ACTIONS)), -1, dtype=np.int16)
+        rows = np.repeat(np.arange(NUM_STATES), np.diff(self.indptr))
+        dense[rows, self.actions] = self.successors
+        return dense
+
+
+_graph = None
+
+
+def get_graph():
+    global _graph
+    if _graph is None:
+        _graph = StateGraph.load()
+    return _graph
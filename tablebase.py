@@ -0,0 +1,152 @@
+import os
+import struct
+import sys
+from collections import deque
+import numpy as np
+from bitboard import ACTIONS, NUM_STATES, Bitboard, CELL_BITS, state_index
+from state_graph import BLACK_WINS, NO_WINNER, get_graph
+
+TABLEBASE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebase.bin")
+TABLEBASE_MAGIC = b"BWTB"
+TABLEBASE_VERSION = 1
+HEADER = struct.Struct("<4sHI")  # magic, version, number of states
+
+# Results are always from the point of view of the side to move.
+WIN, DRAW, LOSS = 1, 0, -1
+
+
+def solve(graph):
+    values = np.zeros(NUM_STATES, dtype=np.int8)
+    distances = np.zeros(NUM_STATES, dtype=np.uint8)
+    solved = np.zeros(NUM_STATES, dtype=bool)
+    queue = deque()
+
+    # Terminal positions: a completed line ends the game, and a side with no moves ends it without a winner.
+    for s in range(NUM_STATES):
+        winner = graph.winner[s]
+        if winner != NO_WINNER:
+            side_has_line = (winner == BLACK_WINS) == ((s & 1) == 0)
+            values[s] = WIN if side_has_line else LOSS
+        elif len(graph.successor_lists[s]):
+            continue
+        solved[s] = True
+        queue.append(s)
+
+    # Only non-terminal positions have moves that can be played backwards into.
+    predecessors = [[] for _ in range(NUM_STATES)]
+    remaining = np.zeros(NUM_STATES, dtype=np.int32)
+    for s in range(NUM_STATES):
+        if solved[s]:
+            continue
+        remaining[s] = len(graph.successor_lists[s])
+        for child in graph.successor_lists[s]:
+            predecessors[child].append(s)
+
+    # Breadth-first from the terminals, so the first LOSS child found gives the fastest win and the
+    # last WIN child to resolve gives the slowest loss.
+    while queue:
+        child = queue.popleft()
+        for parent in predecessors[child]:
+            if solved[parent]:
+                continue
+            if values[child] == LOSS:
+                values[parent] = WIN
+            elif values[child] == WIN:
+                remaining[parent] -= 1
+                if remaining[parent]:
+                    continue
+                values[parent] = LOSS
+            else:
+                continue
+            distances[parent] = distances[child] + 1
+            solved[parent] = True
+            queue.append(parent)
+    # Anything left unresolved can always avoid losing: a draw.
+    return values, distances
+
+
+class Tablebase:
+    def __init__(self, values, distances):
+        self.values = values
+        self.distances = distances
+        self.graph = get_graph()
+
+    @classmethod
+    def build(cls):
+        return cls(*solve(get_graph()))
+
+    @classmethod
+    def load(cls, path=TABLEBASE_FILE):
+        # A file with another header, or cut short, is rebuilt like a missing one.
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                header = f.read(HEADER.size)
+                if len(header) == HEADER.size and HEADER.unpack(header) == (TABLEBASE_MAGIC, TABLEBASE_VERSION, NUM_STATES):
+                    values = np.fromfile(f, dtype=np.int8, count=NUM_STATES)
+                    distances = np.fromfile(f, dtype=np.uint8, count=NUM_STATES)
+                    if len(values) == NUM_STATES and len(distances) == NUM_STATES:
+                        return cls(values, distances)
+        tablebase = cls.build()
+        tablebase.save(path)
+        return tablebase
+
+    def save(self, path=TABLEBASE_FILE):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(HEADER.pack(TABLEBASE_MAGIC, TABLEBASE_VERSION, NUM_STATES))
+                self.values.tofile(f)
+                self.distances.tofile(f)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    def lookup(self, state):
+        return int(self.values[state]), int(self.distances[state])
+
+    def move_result(self, state, action):
+        # The child is scored for the opponent, so flip it back to the mover's point of view.
+        value, distance = self.lookup(self.graph.successor(state, action))
+        return -value, distance + 1
+
+    def move_score(self, state, action):
+        # Single number for ranking and display: faster wins and slower losses score higher.
+        value, distance = self.move_result(state, action)
+        if value == WIN:
+            return 1.0 - distance / 1000.0
+        if value == LOSS:
+            return -1.0 + distance / 1000.0
+        return 0.0
+
+    def best_moves(self, state):
+        scored = [(self.move_score(state, a), ACTIONS[a]) for a in self.graph.action_arrays[state]]
+        if not scored:
+            return []
+        best = max(score for score, _ in scored)
+        return [move for score, move in scored if score == best]
+
+
+_tablebase = None
+
+
+def get_tablebase():
+    global _tablebase
+    if _tablebase is None:
+        _tablebase = Tablebase.load()
+    return _tablebase
+
+
+def describe(value, distance):
+    return {WIN: f"win in {distance} plies", LOSS: f"loss in {distance} plies", DRAW: "draw"}[value]
+
+
+if __name__ == "__main__":
+    tablebase = Tablebase.build()
+    tablebase.save()
+    counts = {name: int((tablebase.values == value).sum()) for name, value in (("wins", WIN), ("draws", DRAW), ("losses", LOSS))}
+    print(f"Solved {NUM_STATES} positions: {counts}, longest forced result {int(tablebase.distances.max())} plies")
+    black = sys.argv[1].split() if len(sys.argv) > 1 else "C 3 5".split()
+    white = sys.argv[2].split() if len(sys.argv) > 2 else "2 4 7".split()
+    board = Bitboard(sum(CELL_BITS[p] for p in black), sum(CELL_BITS[p] for p in white))
+    for player in ('B', 'W'):
+        print(f"Black {' '.join(black)} vs White {' '.join(white)}, {player} to move: {describe(*tablebase.lookup(state_index(board, player)))}")
@@ -0,0 +1,50 @@
+import sys
+import numpy as np
+from bitboard import NUM_STATES, Bitboard, CELL_BITS, state_index
+from state_graph import NO_WINNER, get_graph
+
+
+def build_threats(graph, depth):
+    # threats[s]: the side to move in s can force a completed line within `depth` plies (its own
+    # moves and the replies in between). Depth 1 is "can win with the next move", exactly what
+    # Bitboard.can_win_next answers, and like it ignores whether s itself already has a line.
+    successors = graph.as_dense().astype(np.intp)
+    legal = successors >= 0
+    children = np.maximum(successors, 0)
+    mover_wins = np.where(np.arange(NUM_STATES) & 1, 2, 1)[:, None]
+    has_moves = legal.any(axis=1)
+    won = legal & (graph.winner[children] == mover_wins)
+    # A move that completes a line or leaves the opponent without moves ends the game there.
+    ended = (graph.winner != NO_WINNER) | ~has_moves
+    open_child = legal & ~ended[children]
+
+    wins = won.any(axis=1)
+    losses = np.zeros(NUM_STATES, dtype=bool)
+    for ply in range(2, depth + 1):
+        if ply % 2 == 0:
+            # Lost within ply: every move keeps the game going into a position the opponent wins within ply - 1.
+            losses = has_moves & ~won.any(axis=1) & np.where(legal, open_child & wins[children], True).all(axis=1)
+        else:
+            wins = wins | (open_child & losses[children]).any(axis=1)
+    return wins
+
+
+_threats = {}
+
+
+def get_threats(depth=1):
+    if depth < 1:
+        raise ValueError("Threat depth must be at least 1")
+    if depth not in _threats:
+        _threats[depth] = build_threats(get_graph(), depth)
+    return _threats[depth]
+
+
+if __name__ == "__main__":
+    black = sys.argv[1].split() if len(sys.argv) > 1 else "C 3 5".split()
+    white = sys.argv[2].split() if len(sys.argv) > 2 else "2 4 7".split()
+    board = Bitboard(sum(CELL_BITS[p] for p in black), sum(CELL_BITS[p] for p in white))
+    for depth in (1, 3, 5, 7):
+        threats = get_threats(depth)
+        flags = ", ".join(f"{player} to move: {bool(threats[state_index(board, player)])}" for player in ('B', 'W'))
+        print(f"Depth {depth}: {int(threats.sum())} positions with a forced win | {flags}")
@@ -0,0 +1,202 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from ai_player import BlackVsWhiteAI, SharkAI, PerfectAI, SearchAI, MCTSAI
+from bitboard import index_to_state, state_index
+from repetition import DrawRule
+from start_positions import legal_starts
+
+TOURNAMENT_FILE = "tournament_results.json"
+
+# Every AI that can enter, by dropdown name. Q-table AIs play greedily from frozen tables;
+# options holds the command-line settings plus the Default tables the search AIs order moves by.
+ENTRANTS = {
+    "Default": lambda game, player, options: BlackVsWhiteAI(game, player, options["canonical"]),
+    "Shark": lambda game, player, options: SharkAI(game, player, options["canonical"], options["threat_depth"]),
+    "Perfect": lambda game, player, options: PerfectAI(game, player),
+    "Search": lambda game, player, options: SearchAI(game, player, options["default_tables"], options["search_time"], options["search_nodes"]),
+    "MCTS": lambda game, player, options: MCTSAI(game, player, options["default_tables"], options["mcts_playouts"]),
+}
+
+
+def entrant_name(text):
+    return {name.lower(): name for name in ENTRANTS}.get(text.lower(), text)
+
+
+def wilson(successes, n, z=1.96):
+    # 95% Wilson score interval for a proportion.
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+class Arena:
+    # The game object the AIs read the board and side to move from.
+    def __init__(self, names, options, draw_rule):
+        self.board = None
+        self.current_player = 'B'
+        self.draw_rule = draw_rule
+        options = dict(options, default_tables=tuple(BlackVsWhiteAI(self, player, options["canonical"]).q_table for player in ('B', 'W')))
+        self.ais = {}
+        for name in names:
+            for player in ('B', 'W'):
+                ai = ENTRANTS[name](self, player, options)
+                ai.set_training(False)
+                if hasattr(ai, "verbose"):
+                    ai.verbose = False
+                self.ais[(name, player)] = ai
+
+    def play(self, black_name, white_name, state):
+        # Returns 'B', 'W', or 'D' for a draw: repetition, move cap, or a side left without moves.
+        self.board, self.current_player = index_to_state(state)
+        self.draw_rule.new_game(state)
+        while True:
+            player = self.current_player
+            ai = self.ais[(black_name, 'B')] if player == 'B' else self.ais[(white_name, 'W')]
+            move = ai.get_best_move()
+            if move is None:
+                return 'D'
+            self.board.move(move[0], move[1], player)
+            if self.board.has_won(player):
+                return player
+            self.current_player = 'W' if player == 'B' else 'B'
+            if self.draw_rule.record(state_index(self.board, self.current_player)):
+                return 'D'
+
+
+_arena = None
+
+
+def _init_worker(names, options, draw_rule):
+    global _arena
+    _arena = Arena(names, options, draw_rule)
+
+
+def _play_chunk(task):
+    black_name, white_name, states, seed = task
+    random.seed(seed)
+    results = {'B': 0, 'W': 0, 'D': 0}
+    for state in states:
+        results[_arena.play(black_name, white_name, state)] += 1
+    return black_name, white_name, results['B'], results['W'], results['D']
+
+
+class Tournament:
+    def __init__(self, names, workers, options, draw_rule=None):
+        self.names = names
+        self.workers = workers
+        self.options = options
+        self.draw_rule = draw_rule or DrawRule()
+        # results[(a, b)] = [wins, draws, losses] of a against b, over both colours.
+        self.results = {(a, b): [0, 0, 0] for a in names for b in names if a != b}
+
+    def record(self, black_name, white_name, black_wins, white_wins, draws):
+        for name, opponent, wins, losses in ((black_name, white_name, black_wins, white_wins), (white_name, black_name, white_wins, black_wins)):
+            entry = self.results[(name, opponent)]
+            entry[0] += wins
+            entry[1] += draws
+            entry[2] += losses
+
+    def run(self, states, chunk_size=250, seed=0):
+        rng = random.Random(seed)
+        tasks = [(black, white, states[i:i + chunk_size], rng.getrandbits(32))
+                 for black in self.names for white in self.names if black != white
+                 for i in range(0, len(states), chunk_size)]
+        total_games = sum(len(task[2]) for task in tasks)
+        games = 0
+        start = time.perf_counter()
+        with multiprocessing.Pool(self.workers, _init_worker, (self.names, self.options, self.draw_rule)) as pool:
+            # Results stream in as chunks finish, whatever order the workers take them in.
+            for result in pool.imap_unordered(_play_chunk, tasks):
+                self.record(*result)
+                games += sum(result[2:])
+                print(f"\r{games}/{total_games} games ({games / (time.perf_counter() - start):.0f} games/sec)", end="", flush=True)
+        print()
+        return games
+
+    def score(self, name, opponent=None):
+        # (wins, draws, losses) of name against one opponent, or against everyone.
+        opponents = [opponent] if opponent else [b for b in self.names if b != name]
+        return [sum(self.results[(name, b)][i] for b in opponents) for i in range(3)]
+
+    def report(self):
+        width = max(12, max(len(name) for name in self.names) + 2)
+        print("Score (wins + half the draws) of each row against each column, with 95% Wilson intervals:")
+        print(" " * width + "".join(f"{name:>22s}" for name in self.names))
+        for name in self.names:
+            cells = []
+            for opponent in self.names:
+                if opponent == name:
+                    cells.append(f"{'-':>22s}")
+                    continue
+                wins, draws, losses = self.score(name, opponent)
+                n = wins + draws + losses
+                low, high = wilson(wins + draws / 2, n)
+                cells.append(f"{100 * (wins + draws / 2) / max(n, 1):7.1f}% [{100 * low:4.1f},{100 * high:5.1f}]")
+            print(f"{name:{width}s}" + "".join(cells))
+        print()
+        print("Overall (W/D/L across all opponents, colours, starting positions and first movers):")
+        standings = []
+        for name in self.names:
+            wins, draws, losses = self.score(name)
+            n = wins + draws + losses
+            low, high = wilson(wins + draws / 2, n)
+            standings.append(((wins + draws / 2) / max(n, 1), name, wins, draws, losses, low, high))
+        for rank, (score, name, wins, draws, losses, low, high) in enumerate(sorted(standings, reverse=True), 1):
+            print(f"{rank}. {name:{width}s} {wins:8d} W {draws:8d} D {losses:8d} L  score {100 * score:5.1f}% (95% CI {100 * low:.1f}-{100 * high:.1f})")
+
+    def to_json(self):
+        return {f"{a} vs {b}": dict(zip(("wins", "draws", "losses"), counts)) for (a, b), counts in self.results.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Round-robin tournament between the AIs over every starting position.")
+    parser.add_argument("--ais", nargs='+', type=entrant_name, choices=list(ENTRANTS), default=list(ENTRANTS), help="AIs to enter (default all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--sample", type=int, help="Play only this many randomly chosen starting positions")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for sampling and tie-breaks")
+    parser.add_argument("--canonical", action="store_true", help="Use the symmetry-canonical Q-tables")
+    parser.add_argument("--threat-depth", type=int, default=1, help="Shark threat horizon in plies")
+    parser.add_argument("--search-time", type=float, default=None, help="Search AI seconds per move")
+    parser.add_argument("--search-nodes", type=int, default=2000, help="Search AI nodes per move")
+    parser.add_argument("--mcts-playouts", type=int, default=200, help="MCTS AI playouts per move")
+    parser.add_argument("--repetitions", type=int, default=3, help="Declare a draw when a position occurs this often (0 disables)")
+    parser.add_argument("--max-plies", type=int, default=200, help="Declare a draw after this many moves (0 disables)")
+    parser.add_argument("--output", default=TOURNAMENT_FILE, help="JSON file to write the results to")
+    args = parser.parse_args(argv)
+    if len(set(args.ais)) < 2:
+        parser.error("--ais needs at least two different AIs.")
+    if args.workers <= 0:
+        parser.error("--workers must be positive.")
+
+    states = legal_starts()
+    if args.sample:
+        states = sorted(random.Random(args.seed).sample(states, min(args.sample, len(states))))
+    options = {"canonical": args.canonical, "threat_depth": args.threat_depth, "search_time": args.search_time,
+               "search_nodes": args.search_nodes, "mcts_playouts": args.mcts_playouts}
+    names = list(dict.fromkeys(args.ais))
+    tournament = Tournament(names, args.workers, options, DrawRule(args.repetitions, args.max_plies))
+    print(f"{len(names)} AIs, {len(states)} starting positions (both first movers included), "
+          f"{len(names) * (len(names) - 1) * len(states)} games on {args.workers} workers")
+    start = time.perf_counter()
+    games = tournament.run(states, seed=args.seed)
+    print(f"Played {games} games in {time.perf_counter() - start:.1f}s")
+    tournament.report()
+    with open(args.output, 'w') as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "ais": names, "starting_positions": len(states),
+                   "options": options, "results": tournament.to_json()}, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
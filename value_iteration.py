@@ -0,0 +1,110 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from ai_player import BlackVsWhiteAI, SharkAI
+from qtable import CanonicalQTable, DenseQTable
+from state_graph import NO_WINNER, get_graph
+from threats import get_threats
+
+AI_CLASSES = {"Default": BlackVsWhiteAI, "Shark": SharkAI}
+
+
+class ValueIteration:
+    # Sweeps every (state, action) at once towards the fixed point of update_q_table. Moves are
+    # deterministic, so Q(s, a) = r(s, a) + discount * max Q(s', .) exactly, where s' is the board after
+    # the move keyed to the mover (as in train) and there is no future after a line or with no moves.
+    # Repetition and move-cap draws depend on the game history, so they are not part of the model.
+    def __init__(self, ai_class, discount=0.9, threat_depth=1):
+        graph = get_graph()
+        successors = graph.as_dense().astype(np.intp)
+        legal = successors >= 0
+        children = np.where(legal, successors, 0)
+        terminal = graph.winner != NO_WINNER
+        stuck = ~legal.any(axis=1)
+        states = np.arange(len(successors))
+        # Games end before a side with a line on the board would move, so those rows are never trained.
+        self.active = legal & ~terminal[:, None]
+        self.own_view = children ^ 1
+        self.discount = discount
+
+        won = graph.winner[children] == (states[:, None] & 1) + 1
+        reward = np.where(won, 1.0, np.where(stuck[self.own_view], -0.1, 0.0))
+        # The same shaping as SharkAI.train: the threat penalty first, then the stronger win reward.
+        if ai_class.threat_penalty is not None:
+            reward = np.where(get_threats(threat_depth)[children], ai_class.threat_penalty,
+                              np.where(reward == 1.0, ai_class.win_reward, reward))
+        self.reward = np.where(self.active, reward, 0.0)
+        self.no_future = terminal[self.own_view] | stuck[self.own_view]
+        self.q = np.zeros(self.reward.shape)
+        self.sweeps = 0
+
+    def sweep(self):
+        values = np.where(self.active, self.q, -np.inf).max(axis=1)
+        future = np.where(self.no_future, 0.0, values[self.own_view])
+        q = np.where(self.active, self.reward + self.discount * future, 0.0)
+        delta = float(np.abs(q - self.q).max())
+        self.q = q
+        self.sweeps += 1
+        return delta
+
+    def solve(self, tolerance=1e-6, max_sweeps=1000):
+        # Returns the last max |dQ|; each sweep shrinks the error by the discount factor.
+        delta = float('inf')
+        while delta > tolerance and self.sweeps < max_sweeps:
+            delta = self.sweep()
+        return delta
+
+    def fill(self, table, states):
+        # Writes the solved values of the given states into any DenseQTable-style table.
+        rows, cols = np.nonzero(self.active[states])
+        rows = states[rows]
+        entries = table.entries(rows, cols)
+        table.values[entries] = self.q[rows, cols]
+        table.seen[entries] = True
+        table.dirty = True
+        return table
+
+
+def write_tables(solver, ai_class, canonical, directory="."):
+    states = np.arange(solver.q.shape[0])
+    if canonical:
+        tables = {f"{ai_class.table_name}_canonical.qtb": solver.fill(CanonicalQTable(), states)}
+    else:
+        # Each colour's table only holds the positions it moves in, like one trained by self-play.
+        tables = {f"{ai_class.table_name}_{player}.qtb": solver.fill(DenseQTable(), states[(states & 1) == side])
+                  for side, player in ((0, 'b'), (1, 'w'))}
+    for name, table in tables.items():
+        table.save(os.path.join(directory, name))
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill the Q-tables by value iteration over every position.")
+    parser.add_argument("--ai", nargs='+', choices=list(AI_CLASSES), default=list(AI_CLASSES), help="AI types to solve")
+    parser.add_argument("--canonical", action="store_true", help="Write symmetry-canonical tables")
+    parser.add_argument("--threat-depth", type=int, default=1, help="Shark threat horizon in plies")
+    parser.add_argument("--discount", type=float, default=0.9, help="Discount factor, as in BlackVsWhiteAI")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Stop once no Q-value changes by more than this")
+    parser.add_argument("--max-sweeps", type=int, default=1000, help="Upper bound on the number of sweeps")
+    args = parser.parse_args(argv)
+    if args.threat_depth < 1:
+        parser.error("--threat-depth must be at least 1.")
+    if not 0.0 <= args.discount < 1.0:
+        parser.error("--discount must be in [0, 1).")
+
+    for name in args.ai:
+        start = time.perf_counter()
+        solver = ValueIteration(AI_CLASSES[name], args.discount, args.threat_depth)
+        delta = solver.solve(args.tolerance, args.max_sweeps)
+        tables = write_tables(solver, AI_CLASSES[name], args.canonical)
+        elapsed = time.perf_counter() - start
+        status = "converged" if delta <= args.tolerance else "not converged"
+        print(f"{name}: {status} after {solver.sweeps} sweeps (max |dQ| {delta:.2e}) in {elapsed:.2f}s, "
+              f"wrote {', '.join(f'{file} ({len(table)} entries)' for file, table in tables.items())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())